@@ -0,0 +1,855 @@
+"""Offline benchmarks for the scoreboard bot.
+
+Runs against throwaway SQLite files, never the live database:
+
+    python bench.py storage [--profiles legacy,balanced,fast] [--seconds 10] [--writers 2] [--readers 4]
+    python bench.py ratings [--matches 200000] [--players 2000] [--games 3] [--small-players 12]
+    python bench.py topk [--sizes 10000,100000,1000000] [--k 10] [--repeat 5]
+    python bench.py load [--matches 10000,100000] [--concurrency 1,8,32] [--guilds 1] [--seconds 10] [--mix report=1,...]
+    python bench.py cluster [--workers 3] [--matches 20000] [--concurrency 8] [--seconds 10] [--no-relay]
+    python bench.py consistency [--ops 400] [--check-every 50] [--players 12] [--seed 7]
+    python bench.py import [--runs 10] [--max-ms N]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+import bot
+
+
+def _pct(samples, q):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+
+def _member(uid: int):
+    return SimpleNamespace(id=uid, display_name=f"player{uid}", name=f"player{uid}")
+
+
+def _seed(make_session, games: int, players: int):
+    session = make_session()
+    try:
+        for i in range(games):
+            bot.get_or_create_game(session, bot.NO_GUILD, f"game{i}")
+        for uid in range(1, players + 1):
+            bot.upsert_user(session, _member(uid))
+        session.commit()
+        bot.game_registry.load(session)
+        bot.season_cache.load(session)
+        bot.rank_index.invalidate()
+    finally:
+        session.close()
+
+
+def bench_storage(args):
+    print(f"{'profile':<10} {'reports/s':>10} {'reads/s':>10} {'report p50/p95 ms':>18} {'read p50/p95 ms':>16} {'errors':>7}")
+    for profile in args.profiles.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            eng = bot.make_engine(os.path.join(tmp, "bench.db"), profile)
+            bot.Base.metadata.create_all(eng)
+            bot.ensure_indexes(eng)
+            make_session = sessionmaker(bind=eng, autoflush=False)
+            _seed(make_session, args.games, args.players)
+
+            lat = {"report": [], "read": []}
+            errors = [0]
+            stop = time.perf_counter() + args.seconds
+            lock = threading.Lock()
+
+            def writer(seed):
+                rnd = random.Random(seed)
+                while time.perf_counter() < stop:
+                    a, b = rnd.sample(range(1, args.players + 1), 2)
+                    t0 = time.perf_counter()
+                    session = make_session()
+                    try:
+                        bot._report_tx(session, bot.NO_GUILD, _member(a), _member(a), _member(b),
+                                       f"game{rnd.randrange(args.games)}", rnd.randint(0, 40), rnd.randint(0, 40), None)
+                        with lock:
+                            lat["report"].append(time.perf_counter() - t0)
+                    except Exception:
+                        session.rollback()
+                        with lock:
+                            errors[0] += 1
+                    finally:
+                        session.close()
+
+            def reader(seed):
+                rnd = random.Random(seed)
+                while time.perf_counter() < stop:
+                    t0 = time.perf_counter()
+                    session = make_session()
+                    try:
+                        bot._record_tx(session, bot.NO_GUILD, f"game{rnd.randrange(args.games)}", None, None, None)
+                        with lock:
+                            lat["read"].append(time.perf_counter() - t0)
+                    except Exception:
+                        with lock:
+                            errors[0] += 1
+                    finally:
+                        session.close()
+
+            threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+            threads += [threading.Thread(target=reader, args=(100 + i,)) for i in range(args.readers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            eng.dispose()
+
+            w, r = lat["report"], lat["read"]
+            print(
+                f"{profile:<10} {len(w) / args.seconds:>10.1f} {len(r) / args.seconds:>10.1f} "
+                f"{_pct(w, .5):>8.1f}/{_pct(w, .95):<9.1f} {_pct(r, .5):>7.1f}/{_pct(r, .95):<8.1f} {errors[0]:>7}"
+            )
+
+
+def synthetic_history(matches: int, players: int, games: int, seasons: int = 4, seed: int = 7):
+    """Rows shaped like bot.load_match_history(): (id, game, season, winner, loser, elo_delta, season_elo_delta)."""
+    rnd = random.Random(seed)
+    rows = []
+    for mid in range(1, matches + 1):
+        a, b = rnd.sample(range(1, players + 1), 2)
+        sid = rnd.choice([bot.ALL_SEASONS] + list(range(1, seasons + 1)))
+        rows.append((mid, rnd.randrange(1, games + 1), sid, a, b, None, None))
+    return rows
+
+
+def bench_ratings(args):
+    cases = [(args.players, args.games)]
+    if args.small_players:
+        cases.append((args.small_players, 1))  # small pool: narrow levels, where the plain loop wins
+    for players, games in cases:
+        _bench_replay(synthetic_history(args.matches, players, games), args.matches, players, games)
+
+
+def _bench_replay(rows, matches: int, players: int, games: int):
+    print(f"{matches} matches, {players} players, {games} games")
+    t0 = time.perf_counter()
+    naive = bot.replay_elo_naive(rows)
+    t_naive = time.perf_counter() - t0
+    if bot.np is None:
+        print(f"naive      {t_naive:8.2f}s   (numpy not installed; vectorized replay unavailable)")
+        return
+    t0 = time.perf_counter()
+    vec = bot.replay_elo_vectorized(rows)
+    t_vec = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    bot.replay_elo(rows)
+    t_auto = time.perf_counter() - t0
+    a = dict(zip(naive.slots, naive.ratings))
+    b = dict(zip(vec.slots, vec.ratings))
+    drift = max(abs(a[k] - b[k]) for k in a) if a.keys() == b.keys() else float("inf")
+    print(f"naive      {t_naive:8.2f}s")
+    print(f"vectorized {t_vec:8.2f}s   ({t_naive / t_vec:.1f}x, max rating drift {drift:.2e})")
+    print(f"replay_elo {t_auto:8.2f}s   (picks the engine from the pool shape)")
+
+
+def _best(fn, repeat: int):
+    """Fastest of `repeat` runs, in ms, and the last result."""
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, out
+
+
+def _board_sort_key(sort: str = "record"):
+    """Python sort key giving the leaderboard SQL's order (ascending = best first)."""
+    if sort == "elo":
+        return lambda r: (-r.rating, r.user_id)
+    return lambda r: (-r.wins, r.losses, r.user_id)
+
+
+def _top_k(rows, k: int, sort: str = "record") -> list:
+    """The best `k` of in-memory `rows` (BoardRow-like) in leaderboard order, without sorting them all."""
+    return heapq.nsmallest(k, rows, key=_board_sort_key(sort))
+
+
+def bench_topk(args):
+    print(f"top {args.k} by record: full sort vs heapq.nsmallest vs SQL ORDER BY ... LIMIT on player_stats")
+    print(f"{'players':>10} {'sorted ms':>10} {'heap ms':>10} {'sql ms':>10}  same")
+    key = _board_sort_key("record")
+    for n in (int(x) for x in args.sizes.split(",")):
+        rnd = random.Random(n)
+        rows = []
+        for uid in range(1, n + 1):
+            w, l = rnd.randint(0, 200), rnd.randint(0, 200)
+            rows.append(bot.BoardRow(uid, w, l, 0.0, bot.ELO_START))
+        t_sort, by_sort = _best(lambda: sorted(rows, key=key)[:args.k], args.repeat)
+        t_heap, by_heap = _best(lambda: _top_k(rows, args.k), args.repeat)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            eng = bot.make_engine(os.path.join(tmp, "bench.db"), "fast")
+            bot.Base.metadata.create_all(eng)
+            with eng.begin() as conn:
+                conn.execute(bot.Game.__table__.insert(), [{"id": 1, "name": "game", "short_code": "game"}])
+                conn.execute(bot.User.__table__.insert(), [{"id": r.user_id, "display_name": str(r.user_id)} for r in rows])
+                conn.execute(bot.PlayerStat.__table__.insert(), [
+                    {"user_id": r.user_id, "game_id": 1, "season_id": bot.ALL_SEASONS, "wins": r.wins, "losses": r.losses}
+                    for r in rows
+                ])
+                conn.exec_driver_sql("ANALYZE")
+            session = sessionmaker(bind=eng)()
+            try:
+                t_sql, by_sql = _best(lambda: bot.leaderboard_rows(session, bot.NO_GUILD, 1, None, args.k), args.repeat)
+            finally:
+                session.close()
+                eng.dispose()
+
+        same = [r.user_id for r in by_sort] == [r.user_id for r in by_heap] == [r.user_id for r in by_sql]
+        print(f"{n:>10} {t_sort:>10.2f} {t_heap:>10.2f} {t_sql:>10.2f}  {same}")
+
+
+# ----- Load harness: real command callbacks behind a fake Interaction -----
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        await self._interaction.round_trip("defer")
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        await self._interaction.round_trip("defer")
+        self._done = True
+        self._interaction.sent.append(content)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, wait: bool = False, **kwargs):
+        await self._interaction.round_trip("send")
+        self._interaction.sent.append(content)
+        return SimpleNamespace(edit=self._edit)
+
+    async def _edit(self, **kwargs):
+        await self._interaction.round_trip("send")
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the command callbacks: responses are recorded in
+    `sent` instead of going to Discord, and each HTTP call costs `rtt` seconds of sleep, timed
+    into the command's trace like the real aiohttp hooks do."""
+
+    def __init__(self, command: str, user, rtt: float = 0.0, guild_id: Optional[int] = None):
+        self.user = user
+        self.guild_id = guild_id
+        self.data = {"name": command}
+        self.extras = {}
+        self.sent = []
+        self.rtt = rtt
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def round_trip(self, phase: str):
+        started = time.perf_counter()
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+        trace = self.extras.get("trace")
+        if trace is not None:
+            elapsed = time.perf_counter() - started
+            setattr(trace, phase, (getattr(trace, phase) or 0.0) + elapsed)
+
+    async def edit_original_response(self, content=None, **kwargs):
+        await self.round_trip("send")
+        if content is not None:
+            self.sent.append(content)
+
+    @property
+    def failed(self) -> bool:
+        return any(isinstance(text, str) and text.startswith("❌") for text in self.sent)
+
+
+def _seed_history(eng, guilds: int, games: int, seasons: int, players: int, matches: int, seed: int = 7) -> list:
+    """Synthetic guilds (1..guilds, each with its own game1..gameN), seasons (the newest per game
+    active) and match history, with player_stats and Elo rebuilt from it the way /stats_rebuild
+    does. Returns the season names."""
+    rnd = random.Random(seed)
+    now = bot.now_utc()
+    names = [f"S{i + 1}" for i in range(seasons)]
+    guild_of = {(guild - 1) * games + n: guild for guild in range(1, guilds + 1) for n in range(1, games + 1)}
+    season_ids = {}
+    with eng.begin() as conn:
+        conn.execute(bot.Game.__table__.insert(), [
+            {"id": g, "guild_id": guild, "name": f"game{(g - 1) % games + 1}", "short_code": f"game{(g - 1) % games + 1}"}
+            for g, guild in guild_of.items()
+        ])
+        conn.execute(bot.User.__table__.insert(), [
+            {"id": uid, "display_name": f"player{uid}"} for uid in range(1, players + 1)
+        ])
+        rows = []
+        for g, guild in guild_of.items():
+            for i, name in enumerate(names):
+                sid = len(rows) + 1
+                active = i == seasons - 1
+                rows.append({"id": sid, "guild_id": guild, "name": name, "game_id": g,
+                             "status": "active" if active else "closed",
+                             "started_at": now - timedelta(days=30 * (seasons - i)),
+                             "ended_at": None if active else now - timedelta(days=30 * (seasons - i - 1))})
+                season_ids[g, i] = sid
+        if rows:
+            conn.execute(bot.Season.__table__.insert(), rows)
+        history = []
+        span = 30 * max(1, seasons)
+        for mid in range(1, matches + 1):
+            a, b = rnd.sample(range(1, players + 1), 2)
+            g = rnd.randint(1, len(guild_of))
+            age = span * (1 - mid / (matches + 1))  # ids increase with played_at
+            i = min(seasons - 1, int((span - age) // 30)) if seasons else None
+            history.append({
+                "id": mid, "guild_id": guild_of[g], "game_id": g, "season_id": season_ids.get((g, i)), "reporter_id": a,
+                "winner_id": a, "loser_id": b, "score_w": rnd.randint(20, 40), "score_l": rnd.randint(0, 19),
+                "played_at": now - timedelta(days=age), "verified": True, "voided": False,
+            })
+        for i in range(0, len(history), 50_000):
+            conn.execute(bot.Match.__table__.insert(), history[i:i + 50_000])
+    session = sessionmaker(bind=eng, autoflush=False)()
+    try:
+        bot.rebuild_player_stats(session)
+        session.commit()
+    finally:
+        session.close()
+    with eng.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return names
+
+
+def _load_ops(args, seasons: list) -> list:
+    """(command name, weight, callback, kwargs factory) for each command in --mix."""
+    def member(rnd):
+        return _member(rnd.randint(1, args.players))
+
+    def game(rnd):
+        return f"game{rnd.randint(1, args.games)}"
+
+    def season(rnd):
+        return rnd.choice(seasons) if seasons and rnd.random() < 0.5 else None
+
+    def report(rnd):
+        a, b = rnd.sample(range(1, args.players + 1), 2)
+        return {"game": game(rnd), "winner": _member(a), "loser": _member(b),
+                "score_w": rnd.randint(20, 40), "score_l": rnd.randint(0, 19), "season": None}, _member(a)
+
+    def record(rnd):
+        return {"game": game(rnd) if rnd.random() < 0.8 else None, "user": member(rnd), "vs": None,
+                "season": season(rnd)}, member(rnd)
+
+    def head2head(rnd):
+        a, b = rnd.sample(range(1, args.players + 1), 2)
+        return {"user1": _member(a), "user2": _member(b), "game": game(rnd), "season": season(rnd)}, member(rnd)
+
+    def leaderboard(rnd):
+        page = 1 if rnd.random() < 0.7 else rnd.randint(2, max(2, args.players // bot.LEADERBOARD_PAGE_SIZE))
+        return {"game": game(rnd), "season": season(rnd), "sort": None, "page": page}, member(rnd)
+
+    factories = {"report": report, "record": record, "head2head": head2head, "leaderboard": leaderboard}
+    ops = []
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in factories:
+            raise SystemExit(f"unknown command in --mix: {name} (choose from {', '.join(factories)})")
+        command = bot.bot.tree.get_command(name)
+        ops.append((name, float(weight or 1), command.callback, factories[name]))
+    return ops
+
+
+async def _drive(ops, concurrency: int, seconds: float, rtt: float, guilds: int, seed: int) -> dict:
+    """Run `concurrency` simulated users back to back for `seconds`; per-command latencies and errors."""
+    lat = {name: [] for name, *_ in ops}
+    errors = {name: 0 for name, *_ in ops}
+    weights = [w for _, w, *_ in ops]
+    stop = time.perf_counter() + seconds
+
+    async def user(i):
+        rnd = random.Random(seed * 1000 + i)
+        while time.perf_counter() < stop:
+            name, _, callback, make = rnd.choices(ops, weights)[0]
+            kwargs, who = make(rnd)
+            interaction = FakeInteraction(name, who, rtt, rnd.randint(1, guilds))
+            t0 = time.perf_counter()
+            await bot.bot.tree.interaction_check(interaction)  # starts the perf trace, as in production
+            try:
+                await callback(interaction, **kwargs)
+            except Exception:
+                interaction.sent.append("❌ uncaught")
+            await bot.on_app_command_completion(interaction, None)
+            lat[name].append(time.perf_counter() - t0)
+            if interaction.failed:
+                errors[name] += 1
+
+    bot.report_writer.start()
+    try:
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    finally:
+        await bot.report_writer.stop()
+    return {"latency": lat, "errors": errors}
+
+
+def bench_load(args):
+    print(f"{args.guilds} guilds x {args.games} games x {args.seasons} seasons, {args.players} players, mix {args.mix}, "
+          f"{args.rtt_ms:g} ms simulated Discord RTT, stats cache {'on' if args.cache else 'off'}")
+    print(f"{'matches':>9} {'conc':>5} {'command':<12} {'n':>7} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'sql q':>6} {'err':>5}")
+    bot.stats_cache.maxsize = bot.STATS_CACHE_SIZE if args.cache else 0
+    bot.create_bot()
+    for size in (int(x) for x in args.matches.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            eng = bot.make_engine(os.path.join(tmp, "bench.db"), args.profile)
+            bot.init_storage(eng)  # the command callbacks run on this DB from here on
+            seasons = _seed_history(eng, args.guilds, args.games, args.seasons, args.players, size)
+            try:
+                for conc in (int(x) for x in args.concurrency.split(",")):
+                    session = bot.SessionLocal()
+                    try:
+                        bot.game_registry.load(session)
+                        bot.season_cache.load(session)
+                    finally:
+                        bot.SessionLocal.remove()
+                    bot.rank_index.invalidate()
+                    bot.stats_cache.clear()
+                    bot.perf = bot.PerfMetrics()
+                    result = asyncio.run(_drive(_load_ops(args, seasons), conc, args.seconds, args.rtt_ms / 1000, args.guilds, size + conc))
+                    queries = bot.perf.snapshot()["queries"]
+                    all_lat = []
+                    for name, samples in result["latency"].items():
+                        all_lat += samples
+                        q = queries.get(name)
+                        avg_q = q.total / q.count if q and q.count else 0.0
+                        print(f"{size:>9} {conc:>5} {name:<12} {len(samples):>7} {len(samples) / args.seconds:>8.1f} "
+                              f"{_pct(samples, .5):>8.1f} {_pct(samples, .95):>8.1f} {_pct(samples, .99):>8.1f} "
+                              f"{avg_q:>6.1f} {result['errors'][name]:>5}")
+                    print(f"{size:>9} {conc:>5} {'all':<12} {len(all_lat):>7} {len(all_lat) / args.seconds:>8.1f} "
+                          f"{_pct(all_lat, .5):>8.1f} {_pct(all_lat, .95):>8.1f} {_pct(all_lat, .99):>8.1f} "
+                          f"{'':>6} {sum(result['errors'].values()):>5}")
+            finally:
+                bot.SessionLocal.configure(bind=bot.engine)
+                bot.rank_index.invalidate()
+                bot.stats_cache.clear()
+                eng.dispose()
+    bot.db.shutdown()
+
+
+# ----- Cluster harness: several worker processes on one database -----
+def _check_views(args, seasons: list) -> list:
+    """(command name, kwargs) of the responses compared across workers: every leaderboard's first
+    page and a few players' records, per game and season."""
+    views = []
+    for g in range(1, args.games + 1):
+        for season in [None, *seasons]:
+            views.append(("leaderboard", {"game": f"game{g}", "season": season, "sort": None, "page": 1}))
+            for uid in range(1, min(args.players, 5) + 1):
+                views.append(("record", {"game": f"game{g}", "user": _member(uid), "vs": None, "season": season}))
+    return views
+
+
+async def _render(views: list, guilds: int) -> dict:
+    """Each view's response text in each guild, through the real callbacks (and so the caches)."""
+    out = {}
+    for guild in range(1, guilds + 1):
+        for name, kwargs in views:
+            interaction = FakeInteraction(name, _member(1), guild_id=guild)
+            await bot.bot.tree.get_command(name).callback(interaction, **kwargs)
+            key = f"{guild}/{name}/" + "/".join(str(getattr(v, "id", v)) for v in kwargs.values())
+            out[key] = "\n".join(str(text) for text in interaction.sent)
+    return out
+
+
+async def _cluster_worker(args) -> dict:
+    fences = set()
+
+    def fence(worker: int):
+        fences.add(worker)
+
+    if not args.relay:  # control run: share nothing but the fences, so caches go stale
+        bot.cache_bus.hooks.clear()
+    bot.cache_bus.register("bench.fence", fence)
+    bot.create_app()  # workers run in the temp dir, so this is the seeded records.db
+    await bot.cache_bus.connect(bot.CLUSTER_BUS)
+    session = bot.SessionLocal()
+    try:
+        bot.game_registry.load(session)
+        bot.season_cache.load(session)
+    finally:
+        bot.SessionLocal.remove()
+
+    seasons = [f"S{i + 1}" for i in range(args.seasons)]
+    views = _check_views(args, seasons)
+    await _render(views, args.guilds)  # warm the caches so stale entries would show
+    result = await _drive(_load_ops(args, seasons), args.concurrency, args.seconds, 0.0, args.guilds,
+                          args.seed * 7919 + bot.CLUSTER_WORKER)
+
+    # Barrier: the hub relays each worker's lines in order, so once every other worker's fence
+    # has arrived, so has every cache update it published while writing
+    bot.cache_bus.publish("bench.fence", bot.CLUSTER_WORKER)
+    deadline = time.perf_counter() + 30
+    while len(fences) < args.workers - 1:
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"worker {bot.CLUSTER_WORKER}: only {len(fences)} of {args.workers - 1} fences arrived")
+        await asyncio.sleep(0.01)
+
+    cached = await _render(views, args.guilds)
+    bot.stats_cache.clear()
+    bot.rank_index.invalidate()
+    fresh = await _render(views, args.guilds)
+    await bot.cache_bus.close()
+    return {
+        "worker": bot.CLUSTER_WORKER,
+        "ops": {name: len(samples) for name, samples in result["latency"].items()},
+        "errors": sum(result["errors"].values()),
+        "sent": bot.cache_bus.sent,
+        "received": bot.cache_bus.received,
+        "cached": cached,
+        "fresh": fresh,
+    }
+
+
+def bench_cluster_worker(args):
+    result = asyncio.run(_cluster_worker(args))
+    bot.db.shutdown()
+    print(json.dumps(result))
+
+
+def bench_cluster(args):
+    """Seed a database, run --workers processes of real command traffic against it with the
+    cache relay, then check every worker's cached responses against a fresh read."""
+    print(f"{args.workers} workers x {args.concurrency} users, {args.guilds} guilds x {args.games} games, "
+          f"{args.matches} seeded matches, {args.seconds:g}s, cache relay {'on' if args.relay else 'OFF'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = bot.make_engine(os.path.join(tmp, "records.db"), args.profile)
+        bot.Base.metadata.create_all(eng)
+        bot.ensure_indexes(eng)
+        _seed_history(eng, args.guilds, args.games, args.seasons, args.players, args.matches)
+        eng.dispose()
+
+        async def run():
+            hub = bot.ClusterHub()
+            address = await hub.start()
+            forwarded = ["--workers", str(args.workers), "--seconds", str(args.seconds),
+                         "--concurrency", str(args.concurrency), "--players", str(args.players),
+                         "--guilds", str(args.guilds), "--games", str(args.games), "--seasons", str(args.seasons),
+                         "--mix", args.mix, "--profile", args.profile, "--seed", str(args.seed)]
+            if not args.relay:
+                forwarded.append("--no-relay")
+            procs = []
+            for i in range(args.workers):
+                env = {k: v for k, v in os.environ.items() if k != "DYNO"}
+                env.update(CLUSTER_WORKER=str(i), CLUSTER_BUS=address, DB_PROFILE=args.profile)
+                procs.append(await asyncio.create_subprocess_exec(
+                    sys.executable, os.path.abspath(__file__), "cluster-worker", *forwarded,
+                    cwd=tmp, env=env, stdout=asyncio.subprocess.PIPE))
+            try:
+                outputs = [await p.communicate() for p in procs]
+            finally:
+                await hub.close()
+            return [(p.returncode, out) for p, (out, _) in zip(procs, outputs)]
+
+        finished = asyncio.run(run())
+
+    results = []
+    for i, (code, out) in enumerate(finished):
+        lines = out.decode().strip().splitlines()
+        if code != 0 or not lines:
+            raise SystemExit(f"worker {i} failed (exit code {code})")
+        results.append(json.loads(lines[-1]))
+
+    truth = results[0]["fresh"]
+    print(f"{'worker':>6} {'ops':>7} {'ops/s':>8} {'err':>5} {'relayed out':>12} {'in':>7} {'views':>6} {'stale':>6}")
+    total_stale = 0
+    for r in results:
+        ops = sum(r["ops"].values())
+        if r["fresh"] != truth:
+            raise SystemExit(f"worker {r['worker']}: fresh reads disagree with worker 0 (same database?)")
+        stale = [key for key, text in r["cached"].items() if text != truth[key]]
+        total_stale += len(stale)
+        print(f"{r['worker']:>6} {ops:>7} {ops / args.seconds:>8.1f} {r['errors']:>5} {r['sent']:>12} "
+              f"{r['received']:>7} {len(truth):>6} {len(stale):>6}")
+        for key in stale[:3]:
+            print(f"         stale: {key}")
+    print("consistent: every worker's cached responses match the database" if not total_stale
+          else f"INCONSISTENT: {total_stale} stale cached responses")
+    if total_stale and args.relay:
+        sys.exit(1)
+
+
+# ----- Consistency: incremental player_stats and Elo must equal a rebuild from match history -----
+def _stats_state(session) -> tuple:
+    """player_stats as {(user, game, season): (wins, losses, rating)}, without the 0-0 rows at
+    ELO_START a rebuild never writes, and the live matches' {id: (elo_delta, season_elo_delta)}."""
+    stats = {
+        (r.user_id, r.game_id, r.season_id): (r.wins, r.losses, r.rating)
+        for r in session.execute(select(bot.PlayerStat)).scalars()
+        if r.wins or r.losses or abs(r.rating - bot.ELO_START) > 1e-6
+    }
+    deltas = {
+        mid: (d_all, d_season)
+        for mid, d_all, d_season in session.execute(
+            select(bot.Match.id, bot.Match.elo_delta, bot.Match.season_elo_delta)
+            .where(bot.Match.verified == True, bot.Match.voided == False)
+        ).all()
+    }
+    return stats, deltas
+
+
+def _drift(incremental: tuple, rebuilt: tuple, tol: float = 1e-6) -> list:
+    """Human-readable differences between two _stats_state() results."""
+    out = []
+    for name, got, want in (("player_stats", incremental[0], rebuilt[0]), ("match delta", incremental[1], rebuilt[1])):
+        for key in sorted(got.keys() | want.keys(), key=str):
+            a, b = got.get(key), want.get(key)
+            same = a is not None and b is not None and all(
+                x == y or (x is not None and y is not None and abs(x - y) <= tol) for x, y in zip(a, b)
+            )
+            if not same:
+                out.append(f"{name} {key}: incremental {a}, rebuild {b}")
+    return out
+
+
+def bench_consistency(args):
+    """Random /report, /undo, /matchup_reset, /season_reset and season rollover traffic through the
+    real transaction functions; every --check-every operations the incremental player_stats and
+    stored Elo deltas are compared with a full rebuild_player_stats() (rolled back). Exits 1 on drift."""
+    rnd = random.Random(args.seed)
+    counts = {name: 0 for name in ("report", "undo", "matchup_reset", "season_reset", "season_rollover")}
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = bot.make_engine(os.path.join(tmp, "bench.db"), "fast")
+        bot.init_storage(eng)
+        session = bot.SessionLocal()
+        try:
+            bot.game_registry.load(session)
+            bot.season_cache.load(session)
+        finally:
+            bot.SessionLocal.remove()
+        bot.rank_index.invalidate()
+        bot.stats_cache.clear()
+        seasons = {}  # (guild, game) -> [season names], the last one active
+        reporters = {}  # guild -> recent reporter ids (/undo only reaches the reporter's own matches)
+
+        def run(fn, *fn_args):
+            session = bot.SessionLocal()
+            try:
+                return fn(session, *fn_args)
+            finally:
+                bot.SessionLocal.remove()
+
+        def rollover(guild: int, game: str):
+            names = seasons.setdefault((guild, game), [])
+            if names:
+                run(bot._season_end_tx, guild, 0, names[-1])
+            names.append(f"{game}-s{len(names) + 1}")
+            run(bot._season_start_tx, guild, 0, names[-1], game)
+
+        def check(done: int):
+            session = bot.SessionLocal()
+            try:
+                bot.begin_write(session)
+                incremental = _stats_state(session)
+                bot.rebuild_player_stats(session)
+                session.flush()
+                rebuilt = _stats_state(session)
+                session.rollback()
+            finally:
+                bot.SessionLocal.remove()
+            diffs = _drift(incremental, rebuilt)
+            print(f"{done:>7} ops  {len(incremental[0]):>6} stat rows  {len(incremental[1]):>6} live matches  "
+                  f"{'OK' if not diffs else f'DRIFT in {len(diffs)} values'}")
+            failed.extend(diffs)
+
+        try:
+            for guild in range(1, args.guilds + 1):
+                for g in range(1, args.games + 1):
+                    rollover(guild, f"game{g}")
+            for done in range(1, args.ops + 1):
+                guild = rnd.randint(1, args.guilds)
+                game = f"game{rnd.randint(1, args.games)}"
+                a, b = rnd.sample(range(1, args.players + 1), 2)
+                season = seasons[guild, game][-1] if rnd.random() < 0.5 else None
+                roll = rnd.random()
+                if roll < 0.70:
+                    score_w, score_l = (rnd.randint(0, 30), rnd.randint(0, 30)) if rnd.random() < 0.7 else (None, None)
+                    run(bot._report_tx, guild, _member(a), _member(a), _member(b), game, score_w, score_l, season)
+                    reporters.setdefault(guild, []).append(a)
+                    counts["report"] += 1
+                elif roll < 0.82 and reporters.get(guild):
+                    run(bot._undo_tx, guild, rnd.choice(reporters[guild][-20:]))
+                    counts["undo"] += 1
+                elif roll < 0.92:
+                    run(bot._matchup_reset_tx, guild, 0, _member(a), _member(b), game, season)
+                    counts["matchup_reset"] += 1
+                elif roll < 0.96:
+                    run(bot._season_reset_tx, guild, 0, rnd.choice(seasons[guild, game]))
+                    counts["season_reset"] += 1
+                else:
+                    rollover(guild, game)
+                    counts["season_rollover"] += 1
+                if done % args.check_every == 0 or done == args.ops:
+                    check(done)
+        finally:
+            bot.SessionLocal.configure(bind=bot.engine)
+            bot.rank_index.invalidate()
+            bot.stats_cache.clear()
+            eng.dispose()
+    print("operations: " + ", ".join(f"{name} {n}" for name, n in counts.items()))
+    for line in failed[:20]:
+        print(f"  {line}")
+    if failed:
+        print(f"FAIL: incremental stats drifted from a rebuild in {len(failed)} values")
+        sys.exit(1)
+    print("consistent: incremental player_stats and Elo deltas match a full rebuild")
+
+
+# ----- Import time: what every tool, test and worker pays for `import bot` -----
+_IMPORT_PROBE = """
+import sys, time
+sys.path.insert(0, {repo!r})
+started = time.perf_counter()
+import aiohttp, discord, dotenv, sqlalchemy
+from discord import app_commands
+from discord.ext import commands
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import declarative_base
+try:
+    import numpy
+except ImportError:
+    pass
+deps = time.perf_counter()
+import bot
+print(deps - started, time.perf_counter() - deps)
+"""
+
+
+def bench_import(args):
+    """Cold `import bot` in fresh interpreters, split into the third-party packages it needs and
+    bot.py's own module body. The import must not create files (no database, no schema work)."""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    deps, own = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {k: v for k, v in os.environ.items() if k != "DYNO"}
+        for _ in range(args.runs):
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(repo=repo)], cwd=tmp, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            d, o = map(float, out.split()[-2:])
+            deps.append(d * 1000)
+            own.append(o * 1000)
+        created = sorted(os.listdir(tmp))
+    print(f"{'':<14} {'min ms':>8} {'median ms':>10} {'max ms':>8}")
+    for name, samples in (("dependencies", deps), ("bot.py", own), ("total", [d + o for d, o in zip(deps, own)])):
+        print(f"{name:<14} {min(samples):>8.1f} {statistics.median(samples):>10.1f} {max(samples):>8.1f}")
+    failed = False
+    if created:
+        print(f"FAIL: importing bot created {', '.join(created)}; storage belongs in create_app()")
+        failed = True
+    if args.max_ms and statistics.median(own) > args.max_ms:
+        print(f"FAIL: bot.py's own import time {statistics.median(own):.1f} ms is over the {args.max_ms:g} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("storage", help="concurrent /report + /leaderboard throughput per storage profile")
+    p.add_argument("--profiles", default=",".join(bot.STORAGE_PROFILES))
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--writers", type=int, default=2)
+    p.add_argument("--readers", type=int, default=4)
+    p.add_argument("--games", type=int, default=3)
+    p.add_argument("--players", type=int, default=200)
+    p.set_defaults(fn=bench_storage)
+
+    p = sub.add_parser("ratings", help="full-history Elo replay: naive loop vs vectorized NumPy")
+    p.add_argument("--matches", type=int, default=200_000)
+    p.add_argument("--players", type=int, default=2000)
+    p.add_argument("--games", type=int, default=3)
+    p.add_argument("--small-players", type=int, default=12, help="also replay a one-game pool this size (0 = skip)")
+    p.set_defaults(fn=bench_ratings)
+
+    p = sub.add_parser("topk", help="leaderboard top-k: full sort vs heap vs SQL ORDER BY LIMIT")
+    p.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated player counts")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(fn=bench_topk)
+
+    p = sub.add_parser("load", help="end-to-end command latency: real /report, /record, ... callbacks, fake Discord")
+    p.add_argument("--matches", default="10000,100000", help="comma-separated match-history sizes to seed")
+    p.add_argument("--concurrency", default="1,8,32", help="comma-separated numbers of simultaneous users")
+    p.add_argument("--seconds", type=float, default=10, help="duration of each run")
+    p.add_argument("--players", type=int, default=2000)
+    p.add_argument("--guilds", type=int, default=1, help="servers sharing the database; each gets --games games")
+    p.add_argument("--games", type=int, default=3)
+    p.add_argument("--seasons", type=int, default=3, help="seasons per game; the newest is active")
+    p.add_argument("--mix", default="report=1,record=4,head2head=2,leaderboard=3", help="command=weight,...")
+    p.add_argument("--rtt-ms", type=float, default=0, help="simulated latency of each Discord HTTP call")
+    p.add_argument("--profile", default=bot.DB_PROFILE, choices=list(bot.STORAGE_PROFILES))
+    p.add_argument("--no-cache", dest="cache", action="store_false", help="disable the stats response cache")
+    p.set_defaults(fn=bench_load)
+
+    for name, fn, help in (("cluster", bench_cluster, "worker processes sharing one database: cross-process cache consistency"),
+                           ("cluster-worker", bench_cluster_worker, argparse.SUPPRESS)):
+        p = sub.add_parser(name, help=help)
+        p.add_argument("--workers", type=int, default=3)
+        p.add_argument("--matches", type=int, default=20_000, help="match history to seed")
+        p.add_argument("--concurrency", type=int, default=8, help="simultaneous users per worker")
+        p.add_argument("--seconds", type=float, default=10)
+        p.add_argument("--players", type=int, default=200)
+        p.add_argument("--guilds", type=int, default=2)
+        p.add_argument("--games", type=int, default=2)
+        p.add_argument("--seasons", type=int, default=2, help="seasons per game; the newest is active")
+        p.add_argument("--mix", default="report=3,record=4,head2head=1,leaderboard=3", help="command=weight,...")
+        p.add_argument("--profile", default=bot.DB_PROFILE, choices=list(bot.STORAGE_PROFILES))
+        p.add_argument("--seed", type=int, default=7)
+        p.add_argument("--no-relay", dest="relay", action="store_false",
+                       help="don't relay cache updates between workers (shows what goes stale without it)")
+        p.set_defaults(fn=fn)
+
+    p = sub.add_parser("consistency", help="incremental player_stats/Elo vs a full rebuild under random writes (exit 1 on drift)")
+    p.add_argument("--ops", type=int, default=400, help="operations to run")
+    p.add_argument("--check-every", type=int, default=50, help="compare with a rebuild every N operations")
+    p.add_argument("--players", type=int, default=12, help="small pool, so players meet often")
+    p.add_argument("--guilds", type=int, default=2)
+    p.add_argument("--games", type=int, default=2)
+    p.add_argument("--seed", type=int, default=7)
+    p.set_defaults(fn=bench_consistency)
+
+    p = sub.add_parser("import", help="cold import time of bot.py (regression check for startup work at import)")
+    p.add_argument("--runs", type=int, default=10, help="fresh interpreters to time")
+    p.add_argument("--max-ms", type=float, default=0,
+                   help="also fail if bot.py's own median import exceeds this many ms (default 0 = off: timings vary by machine)")
+    p.set_defaults(fn=bench_import)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
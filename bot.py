@@ -1,81 +1,624 @@
 from __future__ import annotations
 
 import os
+import math
+import bisect
+import time
 import asyncio
+import threading
+import contextvars
+import contextlib
+import hashlib
+import json
+import signal
+import sys
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional
 
+import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 
+try:
+    import numpy as np
+except ImportError:  # optional: rating replays fall back to a pure-Python loop
+    np = None
+
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Boolean,
-    ForeignKey, create_engine, func, select, and_, or_, BigInteger, event
+    Column, Integer, String, DateTime, Boolean, ForeignKey, create_engine, func, select, and_, or_,
+    BigInteger, event, Index, delete, case, update, null, Float, MetaData, UniqueConstraint, literal, union_all
 )
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker, scoped_session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker, scoped_session
 
 # ------------- Config -------------
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 GUILD_ID = os.getenv("GUILD_ID")  # optional, speeds up slash-command sync for one server
+# Server that rows recorded before per-server storage belong to (defaults to GUILD_ID). Until
+# one is set those rows show in no server; setting it later adopts them on the next start.
+LEGACY_GUILD_ID = int(os.getenv("LEGACY_GUILD_ID") or (GUILD_ID if GUILD_ID and GUILD_ID.isdigit() else 0))
 ADMIN_IDS = {int(x.strip()) for x in os.getenv("ADMINS", "").split(",") if x.strip().isdigit()}
+DB_WORKERS = int(os.getenv("DB_WORKERS", "4"))  # size of the thread pool that runs all SQL
+NAME_FLUSH_SECONDS = float(os.getenv("NAME_FLUSH_SECONDS", "30"))  # how often buffered display names are written
+REPORT_BATCH_MAX = int(os.getenv("REPORT_BATCH_MAX", "50"))  # most /report writes committed together
+REPORT_BATCH_WINDOW_MS = float(os.getenv("REPORT_BATCH_WINDOW_MS", "20"))  # how long a batch waits to fill
+ELO_START = 1500.0
+ELO_K = float(os.getenv("ELO_K", "32"))  # Elo K-factor: max rating swing per match
+LEADERBOARD_VIEW_SECONDS = float(os.getenv("LEADERBOARD_VIEW_SECONDS", "600"))  # how long /leaderboard buttons work
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "1024"))  # rendered stats responses kept (0 disables)
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "60"))  # max age of a cached stats response
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serve Prometheus metrics on 127.0.0.1:<port>/metrics (0 = off)
+# Gateway sharding: unset = one connection (commands.Bot); "auto" = AutoShardedBot with Discord's
+# recommended shard count; a number = AutoShardedBot with exactly that many shards
+SHARD_COUNT = os.getenv("SHARD_COUNT", "").strip().lower()
+# Cluster workers (set by `python bot.py --cluster N`): the shards this process runs, its index
+# (worker 0 syncs commands and runs batch jobs) and the launcher's cache-invalidation relay
+SHARD_IDS = [int(x) for x in os.getenv("SHARD_IDS", "").split(",") if x.strip().isdigit()]
+CLUSTER_WORKER = int(os.getenv("CLUSTER_WORKER", "0"))
+CLUSTER_BUS = os.getenv("CLUSTER_BUS", "")  # host:port
+GLICKO_PERIOD_DAYS = float(os.getenv("GLICKO_PERIOD_DAYS", "7"))  # Glicko-2 rating period unless a season sets its own
+GLICKO_TAU = float(os.getenv("GLICKO_TAU", "0.5"))  # Glicko-2 system constant: how fast volatility may change
+GLICKO_RUN_MINUTES = float(os.getenv("GLICKO_RUN_MINUTES", "60"))  # how often closed rating periods get rated
 
 # Use minimal intents (no privileged ones needed for slash commands)
 INTENTS = discord.Intents.default()
 
+# ------------- Metrics -------------
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+QUERY_COUNT_BOUNDS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Fixed-bucket histogram: counts per upper bound, plus one bucket above the last bound."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the largest value seen)."""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.bounds + (self.max,), self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(bound, self.max)
+        return 0.0
+
+    def copy(self) -> "Histogram":
+        h = Histogram(self.bounds)
+        h.counts, h.count, h.total, h.max = list(self.counts), self.count, self.total, self.max
+        return h
+
+class RateMeter:
+    """Events per second over the last `window` seconds, counted in one-second buckets."""
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self._counts = [0] * window
+        self._seconds = [0] * window  # which second each bucket currently counts
+
+    def add(self, now: Optional[float] = None):
+        sec = int(time.monotonic() if now is None else now)
+        i = sec % self.window
+        if self._seconds[i] != sec:
+            self._seconds[i], self._counts[i] = sec, 0
+        self._counts[i] += 1
+
+    def rate(self, now: Optional[float] = None) -> float:
+        sec = int(time.monotonic() if now is None else now)
+        return sum(n for n, at in zip(self._counts, self._seconds) if sec - at < self.window) / self.window
+
+class CommandTrace:
+    """Timings (seconds) of one app command, filled in while it runs; see `current_trace`."""
+    __slots__ = ("command", "shard", "started", "defer", "db", "send", "sql", "sql_queries")
+
+    def __init__(self, command: str, shard: int = 0):
+        self.command = command
+        self.shard = shard  # gateway shard the interaction arrived on
+        self.started = time.perf_counter()
+        self.defer = None  # interaction callback (defer or immediate reply); None = not made
+        self.send = None   # followups and edits of the original response
+        self.db = 0.0      # awaiting the DB pool, queueing included
+        self.sql = 0.0     # inside cursor.execute
+        self.sql_queries = 0
+
+# The running command's trace; DBExecutor copies it into worker threads so SQL is attributed
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+class PerfMetrics:
+    """Histograms of per-command latency by phase (ms), SQL statements per command, and the
+    latency of every SQL statement. SQL run outside a command (report batches, background jobs)
+    is filed under "background". Per gateway shard: interaction count, rate and total latency.
+    """
+    PHASES = ("total", "defer", "db", "send", "sql")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}     # (command, phase) -> Histogram of ms
+        self._queries = {}     # command -> Histogram of SQL statements per invocation
+        self._statements = {}  # command -> Histogram of ms per SQL statement
+        self._shards = {}      # shard id -> Histogram of total ms per interaction
+        self._shard_rates = defaultdict(RateMeter)
+        self.errors = defaultdict(int)
+
+    @staticmethod
+    def _hist(table: dict, key, bounds) -> Histogram:
+        h = table.get(key)
+        if h is None:
+            h = table[key] = Histogram(bounds)
+        return h
+
+    def start(self, command: str, shard: int = 0) -> CommandTrace:
+        trace = CommandTrace(command, shard)
+        current_trace.set(trace)
+        return trace
+
+    def finish(self, trace: CommandTrace, failed: bool = False):
+        total = time.perf_counter() - trace.started
+        phases = {"total": total, "defer": trace.defer, "db": trace.db, "send": trace.send, "sql": trace.sql}
+        with self._lock:
+            for phase, seconds in phases.items():
+                if seconds is not None:
+                    self._hist(self._latency, (trace.command, phase), LATENCY_BOUNDS_MS).observe(seconds * 1000)
+            self._hist(self._queries, trace.command, QUERY_COUNT_BOUNDS).observe(trace.sql_queries)
+            self._hist(self._shards, trace.shard, LATENCY_BOUNDS_MS).observe(total * 1000)
+            self._shard_rates[trace.shard].add()
+            if failed:
+                self.errors[trace.command] += 1
+
+    def observe_sql(self, seconds: float):
+        trace = current_trace.get()
+        if trace is not None:
+            trace.sql_queries += 1
+            trace.sql += seconds
+        with self._lock:
+            command = trace.command if trace is not None else "background"
+            self._hist(self._statements, command, LATENCY_BOUNDS_MS).observe(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "latency": {k: h.copy() for k, h in self._latency.items()},
+                "queries": {k: h.copy() for k, h in self._queries.items()},
+                "statements": {k: h.copy() for k, h in self._statements.items()},
+                "shards": {k: (h.copy(), self._shard_rates[k].rate()) for k, h in self._shards.items()},
+                "errors": dict(self.errors),
+            }
+
+perf = PerfMetrics()
+
+class StartupTimer:
+    """How long each phase of the first boot took, logged as each one finishes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, seconds)
+        self._last = self.started
+        self.ready_after = None
+
+    def record(self, name: str, seconds: float, log: bool = True):
+        self.phases.append((name, seconds))
+        self._last = time.perf_counter()
+        if log:
+            print(f"Startup: {name} took {seconds * 1000:.0f} ms")
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ready(self):
+        """First on_ready: the gateway phase is everything since the last timed phase."""
+        if self.ready_after is not None:
+            return
+        self.record("gateway connect", time.perf_counter() - self._last)
+        self.ready_after = time.perf_counter() - self.started
+        print(self.summary())
+
+    def summary(self) -> str:
+        phases = " · ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        return f"Startup: ready after {self.ready_after:.2f}s ({phases})"
+
+startup = StartupTimer()
+
+def discord_http_trace() -> aiohttp.TraceConfig:
+    """aiohttp hooks timing interaction responses into the calling command's trace."""
+    config = aiohttp.TraceConfig()
+
+    async def _started(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def _ended(session, ctx, params):
+        trace = current_trace.get()
+        if trace is None or not hasattr(ctx, "started"):
+            return
+        elapsed = time.perf_counter() - ctx.started
+        path = params.url.path
+        if "/interactions/" in path and path.endswith("/callback"):
+            trace.defer = (trace.defer or 0.0) + elapsed
+        elif "/webhooks/" in path:
+            trace.send = (trace.send or 0.0) + elapsed
+
+    config.on_request_start.append(_started)
+    config.on_request_end.append(_ended)
+    config.on_request_exception.append(_ended)
+    return config
+
 # ------------- DB Setup (SQLite only) -------------
 Base = declarative_base()
 
 # Always use SQLite; on Heroku the only writable place is /tmp
 DB_PATH = "/tmp/records.db" if os.getenv("DYNO") else "records.db"
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
-    echo=False,
-    future=True,
-    connect_args={"check_same_thread": False},
-)
 
-# Enforce foreign keys in SQLite
-@event.listens_for(engine, "connect")
-def _fk_on(dbapi_conn, _):
-    cur = dbapi_conn.cursor()
-    cur.execute("PRAGMA foreign_keys=ON")
-    cur.close()
+# Storage profiles: SQLite pragmas applied to every new connection. Pick one with DB_PROFILE;
+# any single pragma can be overridden with SQLITE_<PRAGMA>, e.g. SQLITE_SYNCHRONOUS=FULL.
+STORAGE_PROFILES = {
+    # SQLite defaults: rollback journal, full fsync on every commit, readers block writers
+    "legacy": {"journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0,
+               "cache_size": -2000, "busy_timeout": 5000},
+    # WAL: readers never block the writer; fsync only at checkpoints (durable across app crashes)
+    "balanced": {"journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 256 * 1024 * 1024,
+                 "cache_size": -65536, "busy_timeout": 5000},
+    # WAL without fsync: fastest, may lose the last commits on power loss (fine for /tmp on a dyno)
+    "fast": {"journal_mode": "WAL", "synchronous": "OFF", "mmap_size": 1024 * 1024 * 1024,
+             "cache_size": -262144, "busy_timeout": 10000},
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "balanced")
+
+def storage_settings(profile: str) -> dict:
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; choose from {', '.join(STORAGE_PROFILES)}")
+    settings = dict(STORAGE_PROFILES[profile])
+    for pragma in settings:
+        override = os.getenv(f"SQLITE_{pragma.upper()}")
+        if override:
+            settings[pragma] = override
+    return settings
+
+def make_engine(path: str, profile: str = DB_PROFILE):
+    settings = storage_settings(profile)
+    eng = create_engine(
+        f"sqlite:///{path}",
+        echo=False,
+        future=True,
+        connect_args={"check_same_thread": False},
+    )
+
+    # Enforce foreign keys in SQLite and apply the storage profile
+    @event.listens_for(eng, "connect")
+    def _fk_on(dbapi_conn, _):
+        # Let SQLAlchemy own transactions (pysqlite's implicit BEGIN breaks SAVEPOINT)
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA foreign_keys=ON")
+        for pragma, value in settings.items():
+            cur.execute(f"PRAGMA {pragma}={value}")
+        cur.close()
+
+    @event.listens_for(eng, "begin")
+    def _begin(conn):
+        # Writers take the write lock up front; a deferred read-then-write transaction can't
+        # wait for the lock when another writer holds it and fails with "database is locked"
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.get_execution_options().get("sqlite_immediate") else "BEGIN")
+
+    # Count and time every statement for the perf metrics
+    @event.listens_for(eng, "before_cursor_execute")
+    def _sql_started(conn, cursor, statement, parameters, context, executemany):
+        context._perf_started = time.perf_counter()
+
+    @event.listens_for(eng, "after_cursor_execute")
+    def _sql_ended(conn, cursor, statement, parameters, context, executemany):
+        perf.observe_sql(time.perf_counter() - context._perf_started)
+
+    return eng
+
+# Creating the engine doesn't touch the database; init_storage() connects and migrates it
+engine = make_engine(DB_PATH)
 
 SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False))
 
+def begin_write(session):
+    """Start `session`'s transaction as a writer (BEGIN IMMEDIATE). Call before its first query."""
+    session.connection(execution_options={"sqlite_immediate": True})
+
+def on_commit(session, fn, *args):
+    """Run fn(*args) once `session` commits; dropped if it rolls back instead.
+
+    Used to publish new rows into in-process caches only after they are durable.
+    """
+    session.info.setdefault("on_commit", []).append((fn, args))
+
+def on_commit_shared(session, fn, *args):
+    """`on_commit`, and once committed the other cluster workers run fn(*args) too.
+
+    For cache updates: fn must be registered with `cache_bus` and its args JSON-serializable.
+    """
+    on_commit(session, fn, *args)
+    on_commit(session, cache_bus.share, fn, *args)
+
+# SQLAlchemy fires both events for a SAVEPOINT too; hooks wait for the outermost transaction
+# (a rolled-back savepoint drops its own hooks, see _report_batch_tx)
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session):
+    if session.in_nested_transaction():
+        return
+    for fn, args in session.info.pop("on_commit", []):
+        fn(*args)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop("on_commit", None)
+
 def now_utc():
     return datetime.now(timezone.utc)
 
+# ------------- Data access (off the event loop) -------------
+class DBExecutor:
+    """Runs blocking SQLAlchemy work on a bounded thread pool so handlers never stall the gateway.
+
+    `await db.run(fn, *args)` calls `fn(session, *args)` in a worker thread with a fresh session,
+    rolls back on error and always closes the session. Queue depth and wait time are tracked.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        self._lock = threading.Lock()
+        self.queued = 0        # submitted, waiting for a worker
+        self.running = 0       # currently executing on a worker
+        self.calls = 0
+        self.errors = 0
+        self.wait_total = 0.0  # seconds spent queued, summed over calls
+        self.wait_max = 0.0
+        self.run_total = 0.0   # seconds spent executing, summed over calls
+
+    def _job(self, submitted: float, fn, args, kwargs):
+        started = time.perf_counter()
+        waited = started - submitted
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        session = SessionLocal()
+        try:
+            return fn(session, *args, **kwargs)
+        except Exception:
+            session.rollback()
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            session.close()
+            SessionLocal.remove()
+            with self._lock:
+                self.running -= 1
+                self.calls += 1
+                self.run_total += time.perf_counter() - started
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()  # carries the command's perf trace into the worker
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._pool, ctx.run, self._job, started, fn, args, kwargs)
+        finally:
+            trace = current_trace.get()
+            if trace is not None:
+                trace.db += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self.calls or 1
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "calls": self.calls,
+                "errors": self.errors,
+                "wait_avg_ms": self.wait_total / n * 1000,
+                "wait_max_ms": self.wait_max * 1000,
+                "run_avg_ms": self.run_total / n * 1000,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+db = DBExecutor(DB_WORKERS)
+
+class SingleFlight:
+    """Coalesces concurrent identical requests onto one in-flight computation.
+
+    The first caller for a key starts the work; callers arriving before it finishes await the
+    same result (or exception) instead of running their own queries. Nothing is kept once the
+    work completes, so this never serves stale data. Event-loop only, no locking needed.
+    """
+
+    def __init__(self):
+        self._inflight = {}  # key -> Future
+        self.calls = 0
+        self.shared = 0      # calls answered by someone else's computation
+
+    async def run(self, key, fn, *args, **kwargs):
+        """`await fn(*args, **kwargs)`, unless an identical call (same key) is already running."""
+        self.calls += 1
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = self._inflight[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            fut.add_done_callback(lambda f: self._done(key, f))
+        else:
+            self.shared += 1
+        # shield: one caller giving up (e.g. its interaction expired) mustn't cancel the others
+        return await asyncio.shield(fut)
+
+    def _done(self, key, fut):
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if not fut.cancelled():
+            fut.exception()  # mark retrieved even if every waiter went away
+
+stats_flight = SingleFlight()
+
+class StatsScope(NamedTuple):
+    """What a cached stats response depends on; None = not narrowed that way."""
+    guild_id: int
+    game_id: Optional[int]
+    season: Optional[str]   # lowercased season name filter
+    user_id: Optional[int]
+    vs_id: Optional[int]
+
+class StatsCache:
+    """Bounded LRU of rendered /record, /head2head and /leaderboard responses.
+
+    Committed writes drop just the entries whose scope they touch (`invalidate`); STATS_CACHE_SECONDS
+    bounds staleness from anything that isn't tracked (display names, scheduled rating runs).
+    A response computed across an invalidation is not stored (`generation`).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, StatsScope, value)
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, scope: StatsScope, value, generation: int):
+        with self._lock:
+            if self.maxsize <= 0 or generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, scope, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _touches(scope: StatsScope, guild_id: int, game_id: int, seasons: set, players: Optional[set]) -> bool:
+        if scope.guild_id != guild_id:
+            return False
+        if scope.game_id is not None and scope.game_id != game_id:
+            return False
+        if scope.season is not None and scope.season not in seasons:
+            return False
+        if scope.user_id is None or players is None:
+            return True  # a leaderboard, or a write that touched the whole scope
+        if scope.vs_id is not None:
+            return {scope.user_id, scope.vs_id} == players  # head-to-head: only their own matches
+        # A player's record; with a game it also shows their rank, which anyone's result moves
+        return scope.game_id is not None or scope.user_id in players
+
+    def invalidate(self, guild_id: int, game_id: int, seasons=(), players=None):
+        """Drop entries affected by a committed change to a guild's `game_id` matches in `seasons`
+        (names; a season-less match affects only unfiltered entries) between `players`
+        (None = any player)."""
+        seasons = {name.lower() for name in seasons}
+        players = set(players) if players is not None else None
+        with self._lock:
+            self.generation += 1
+            stale = [k for k, (_, scope, _) in self._entries.items()
+                     if self._touches(scope, guild_id, game_id, seasons, players)]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "invalidations": self.invalidations, "expirations": self.expirations,
+            }
+
+stats_cache = StatsCache(STATS_CACHE_SIZE, STATS_CACHE_SECONDS)
+
 # ------------- Models -------------
+# Guild key of rows from before per-guild storage (the column default) until LEGACY_GUILD_ID
+# adopts them, and guild key for commands used outside a server (DMs); Discord ids are positive
+NO_GUILD = 0
+DM_GUILD = -1
+
 class User(Base):
     __tablename__ = "users"
-    id = Column(BigInteger, primary_key=True)  # Discord user ID (64-bit)
+    id = Column(BigInteger, primary_key=True)  # Discord user ID (64-bit); global, so not per guild
     display_name = Column(String, nullable=False)
     created_at = Column(DateTime, default=now_utc)
 
 class Game(Base):
     __tablename__ = "games"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String, unique=True, nullable=False)
-    short_code = Column(String, unique=True, nullable=False)
+    guild_id = Column(BigInteger, nullable=False, default=NO_GUILD, server_default=str(NO_GUILD))
+    name = Column(String, nullable=False)
+    short_code = Column(String, nullable=False)
+
+    # Each server has its own games; a game's id then scopes its seasons, matches and stats to that server
+    __table_args__ = (
+        UniqueConstraint(guild_id, name, name="uq_games_guild_name"),
+        UniqueConstraint(guild_id, short_code, name="uq_games_guild_code"),
+    )
 
 class Season(Base):
     __tablename__ = "seasons"
     id = Column(Integer, primary_key=True, autoincrement=True)
+    guild_id = Column(BigInteger, nullable=False, default=NO_GUILD, server_default=str(NO_GUILD))
     name = Column(String, nullable=False)
     status = Column(String, default="active")  # active|closed
     game_id = Column(Integer, ForeignKey("games.id"), nullable=True)
     started_at = Column(DateTime, default=now_utc)
     ended_at = Column(DateTime, nullable=True)
+    rating_period_days = Column(Float, nullable=True)  # Glicko-2 period length; GLICKO_PERIOD_DAYS if unset
 
     game = relationship("Game")
 
+    __table_args__ = (
+        Index("ix_seasons_guild", guild_id, status),
+    )
+
 class Match(Base):
     __tablename__ = "matches"
     id = Column(Integer, primary_key=True, autoincrement=True)
+    guild_id = Column(BigInteger, nullable=False, default=NO_GUILD, server_default=str(NO_GUILD))
     game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
     season_id = Column(Integer, ForeignKey("seasons.id"), nullable=True)
 
@@ -91,29 +634,323 @@ class Match(Base):
     voided = Column(Boolean, default=False)
     dupe_of = Column(Integer, ForeignKey("matches.id"), nullable=True)
 
+    # Elo points the winner gained in the game-wide and the season scope (reversed on void)
+    elo_delta = Column(Float, nullable=True)
+    season_elo_delta = Column(Float, nullable=True)
+
     game = relationship("Game")
     season = relationship("Season", foreign_keys=[season_id])
     reporter = relationship("User", foreign_keys=[reporter_id])
     winner = relationship("User", foreign_keys=[winner_id])
     loser = relationship("User", foreign_keys=[loser_id])
 
+    # Hot-path access patterns (see _hot_queries / explain_hot_queries). A game or season belongs
+    # to one guild, so indexes led by game_id / season_id are already per guild:
+    #   dupe check, matchup reset, per-game H2H/wins  -> game + pair (+ recency)
+    #   cross-game record                             -> guild + winner / loser
+    #   season reset & season-filtered stats          -> season
+    #   /undo for a reporter                          -> guild + reporter + newest id, live rows only
+    __table_args__ = (
+        Index("ix_matches_game_pair", game_id, winner_id, loser_id, played_at),
+        Index("ix_matches_guild_winner", guild_id, winner_id, loser_id, game_id),
+        Index("ix_matches_guild_loser", guild_id, loser_id, winner_id, game_id),
+        Index("ix_matches_season", season_id, game_id),
+        Index("ix_matches_guild_reporter_live", guild_id, reporter_id, id, sqlite_where=voided == False),
+    )
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
     id = Column(Integer, primary_key=True, autoincrement=True)
+    guild_id = Column(BigInteger, nullable=False, default=NO_GUILD, server_default=str(NO_GUILD))
     who_id = Column(BigInteger, nullable=False)
     action = Column(String, nullable=False)
     created_at = Column(DateTime, default=now_utc)
 
-Base.metadata.create_all(engine)
+# Season key used in player_stats for "every match in the game, any or no season"
+ALL_SEASONS = 0
+
+class PlayerStat(Base):
+    """Running win/loss totals per (player, game, season), kept in step with `matches`.
+
+    Every live match counts once in the player's ALL_SEASONS row for its game and, when it
+    belongs to a season, once more in that season's row. Games are per guild, so rows are too.
+    """
+    __tablename__ = "player_stats"
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    season_id = Column(Integer, primary_key=True, default=ALL_SEASONS)  # ALL_SEASONS or seasons.id
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    rating = Column(Float, nullable=False, default=ELO_START, server_default=str(ELO_START))  # Elo
+
+    # Latest Glicko-2 snapshot (copied from glicko_snapshots so /record reads it with the row)
+    glicko_rating = Column(Float, nullable=True)
+    glicko_rd = Column(Float, nullable=True)
+    glicko_vol = Column(Float, nullable=True)
+    glicko_period_end = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_player_stats_board", game_id, season_id, wins.desc(), losses),
+        Index("ix_player_stats_elo", game_id, season_id, rating.desc()),
+    )
+
+class GlickoSnapshot(Base):
+    """A player's Glicko-2 state at the end of one rating period they played in.
+
+    Scopes mirror player_stats: ALL_SEASONS rates a whole game, a season id rates that season.
+    Periods a player sits out have no row; their RD widens from the last snapshot.
+    """
+    __tablename__ = "glicko_snapshots"
+    user_id = Column(BigInteger, ForeignKey("users.id"), primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    season_id = Column(Integer, primary_key=True)  # ALL_SEASONS or seasons.id
+    period_end = Column(DateTime, primary_key=True)
+    rating = Column(Float, nullable=False)
+    rd = Column(Float, nullable=False)
+    volatility = Column(Float, nullable=False)
+    games = Column(Integer, nullable=False)  # matches played in the period
+
+    __table_args__ = (
+        Index("ix_glicko_scope", game_id, season_id, period_end),
+    )
+
+class LegacyRows(Base):
+    """Rows of `table_name` that predate per-guild storage: those still on NO_GUILD with
+    id <= max_id. Kept until LEGACY_GUILD_ID is set and adopt_legacy_rows() moves them."""
+    __tablename__ = "legacy_rows"
+    table_name = Column(String, primary_key=True)
+    max_id = Column(Integer, nullable=False)
+
+# Tables partitioned by guild_id, in dependency order (games before the rows that use them)
+GUILD_TABLES = tuple(t.name for t in Base.metadata.sorted_tables if "guild_id" in t.c)
+
+# Indexes older versions created that no model defines any more (superseded by guild-led ones)
+RETIRED_INDEXES = ("ix_matches_winner", "ix_matches_loser", "ix_matches_reporter_live")
+
+def ensure_indexes(bind) -> list:
+    """Create model indexes missing from an existing database and drop RETIRED_INDEXES.
+
+    `create_all` skips tables that already exist, so indexes added to a model later never
+    reach older databases without this. Returns the names of the indexes created.
+    """
+    created = []
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for name in RETIRED_INDEXES:
+            if name in existing:
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+        for table in Base.metadata.sorted_tables:
+            for idx in table.indexes:
+                if idx.name not in existing:
+                    idx.create(conn)
+                    created.append(idx.name)
+        if created:
+            conn.exec_driver_sql("ANALYZE")
+    return created
+
+def ensure_columns(bind) -> list:
+    """Add model columns missing from existing tables (`create_all` never alters a table).
+
+    New columns must be nullable or carry a server_default. Returns "table.column" names added.
+    """
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(bind.dialect)}"
+                if col.server_default is not None:
+                    ddl += f" DEFAULT {col.server_default.arg!r}"
+                conn.exec_driver_sql(ddl)
+                added.append(f"{table.name}.{col.name}")
+    return added
+
+def ensure_games_per_guild(bind) -> bool:
+    """Rebuild `games` if it still has the old global UNIQUE(name) / UNIQUE(short_code), which
+    would stop two servers from both having a "madden". Returns True if it was rebuilt.
+
+    SQLite can't drop a constraint, so this is its documented table swap: create the new
+    table, copy the rows, drop the old one and rename, with foreign keys off so the
+    `matches` / `seasons` references survive the swap.
+    """
+    raw = bind.raw_connection()
+    try:
+        cur = raw.cursor()
+        global_unique = False
+        for _, name, unique, *_ in cur.execute("PRAGMA index_list(games)").fetchall():
+            cols = [row[2] for row in cur.execute(f'PRAGMA index_info("{name}")').fetchall()]
+            if unique and cols in (["name"], ["short_code"]):
+                global_unique = True
+        if not global_unique:
+            return False
+        swap = Game.__table__.to_metadata(MetaData(), name="games_rebuild")
+        cols = ", ".join(c.name for c in Game.__table__.columns)
+        cur.execute("PRAGMA foreign_keys=OFF")
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute(str(CreateTable(swap).compile(dialect=bind.dialect)))
+                cur.execute(f"INSERT INTO games_rebuild ({cols}) SELECT {cols} FROM games")
+                cur.execute("DROP TABLE games")
+                cur.execute("ALTER TABLE games_rebuild RENAME TO games")
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        finally:
+            cur.execute("PRAGMA foreign_keys=ON")
+        return True
+    finally:
+        raw.close()
+
+def mark_legacy_rows(conn):
+    """Record the rows on NO_GUILD as legacy; runs once, when `legacy_rows` is created. They
+    either just got guild_id (defaulting to NO_GUILD) or an older start migrated them without
+    LEGACY_GUILD_ID. Rows made on NO_GUILD after this came from DMs (see move_dm_rows)."""
+    for table in GUILD_TABLES:
+        max_id = conn.exec_driver_sql(f"SELECT MAX(id) FROM {table} WHERE guild_id = ?", (NO_GUILD,)).scalar()
+        if max_id is not None:
+            conn.exec_driver_sql("INSERT INTO legacy_rows (table_name, max_id) VALUES (?, ?)", (table, max_id))
+
+def legacy_rows_pending(conn) -> dict:
+    """{table: rows} of legacy rows still waiting on NO_GUILD for LEGACY_GUILD_ID."""
+    pending = {}
+    for table, max_id in conn.exec_driver_sql("SELECT table_name, max_id FROM legacy_rows").all():
+        n = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table} WHERE guild_id = ? AND id <= ?", (NO_GUILD, max_id)).scalar()
+        if n:
+            pending[table] = n
+    return pending
+
+def adopt_legacy_rows(bind, guild_id: int) -> tuple:
+    """Move the legacy rows (see LegacyRows) into `guild_id`; safe to rerun on every start.
+
+    A legacy game whose name or code the guild already uses is merged into that game: its
+    seasons and matches move over and its ratings are dropped, so the caller must rebuild
+    player_stats. Matches and seasons on NO_GUILD follow their game into the guild.
+    Returns ({table: rows moved}, games merged).
+    """
+    moved, merged = {}, 0
+    with bind.begin() as conn:
+        marks = dict(conn.exec_driver_sql("SELECT table_name, max_id FROM legacy_rows").all())
+        if not marks:
+            return moved, merged
+        legacy_games = conn.exec_driver_sql(
+            "SELECT id, name, short_code FROM games WHERE guild_id = ? AND id <= ?", (NO_GUILD, marks.get("games", 0))
+        ).all()
+        for game_id, name, code in legacy_games:
+            same = conn.exec_driver_sql(
+                "SELECT id FROM games WHERE guild_id = ? AND (name = ? OR short_code = ?) ORDER BY name = ? DESC LIMIT 1",
+                (guild_id, name, code, name),
+            ).scalar()
+            if same is None:
+                continue
+            for table in ("seasons", "matches"):
+                conn.exec_driver_sql(f"UPDATE {table} SET game_id = ? WHERE game_id = ?", (same, game_id))
+            for table in ("player_stats", "glicko_snapshots"):
+                conn.exec_driver_sql(f"DELETE FROM {table} WHERE game_id = ?", (game_id,))
+            conn.exec_driver_sql("DELETE FROM games WHERE id = ?", (game_id,))
+            merged += 1
+        for table in GUILD_TABLES:
+            where = "guild_id = ? AND (id <= ?"
+            if table in ("seasons", "matches"):
+                where += " OR game_id IN (SELECT id FROM games WHERE guild_id = ?)"
+            n = conn.exec_driver_sql(
+                f"UPDATE {table} SET guild_id = ? WHERE {where})",
+                (guild_id, NO_GUILD, marks.get(table, 0)) + ((guild_id,) if table in ("seasons", "matches") else ()),
+            ).rowcount
+            if n:
+                moved[table] = n
+        conn.exec_driver_sql("DELETE FROM legacy_rows")
+    return moved, merged
+
+def move_dm_rows(bind) -> dict:
+    """Move rows older versions made from DMs on NO_GUILD, past the legacy marks, to DM_GUILD so
+    they stay out of legacy adoption; safe to rerun on every start. Seasons and matches follow
+    their game: DM rows in a legacy game can't be told apart from its history and stay with it.
+    Returns {table: rows moved}.
+    """
+    moved = {}
+    with bind.begin() as conn:
+        marks = dict(conn.exec_driver_sql("SELECT table_name, max_id FROM legacy_rows").all())
+        for table in GUILD_TABLES:
+            where = "guild_id = ? AND id > ?"
+            if table in ("seasons", "matches"):
+                where += " AND game_id IN (SELECT id FROM games WHERE guild_id = ?)"
+            n = conn.exec_driver_sql(
+                f"UPDATE {table} SET guild_id = ? WHERE {where}",
+                (DM_GUILD, NO_GUILD, marks.get(table, 0)) + ((DM_GUILD,) if table in ("seasons", "matches") else ()),
+            ).rowcount
+            if n:
+                moved[table] = n
+    return moved
+
+_migrated = set()  # engines init_storage() has already brought up to date
+added_columns = set()  # "table.column" added by init_storage() this run (see backfill_player_stats)
+
+def init_storage(bind=None):
+    """Create missing tables and run the schema migrations on `bind` (default: the DB_PATH
+    engine), then point SessionLocal at it. Runs once per engine; returns the engine."""
+    bind = bind if bind is not None else engine
+    if bind not in _migrated:
+        with bind.connect() as conn:
+            had_legacy_rows = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'legacy_rows'"
+            ).first() is not None
+        Base.metadata.create_all(bind)
+        new_columns = ensure_columns(bind)
+        added_columns.update(new_columns)
+        if new_columns:
+            print(f"Added columns: {', '.join(new_columns)}")
+        if not had_legacy_rows:
+            with bind.begin() as conn:
+                mark_legacy_rows(conn)
+        dm_rows = move_dm_rows(bind)
+        if dm_rows:
+            print("Moved rows made in DMs to their own key: " + ", ".join(f"{n} {table}" for table, n in dm_rows.items()))
+        if LEGACY_GUILD_ID:
+            moved, merged = adopt_legacy_rows(bind, LEGACY_GUILD_ID)
+            if moved:
+                print(f"Assigned rows from before per-guild storage to guild {LEGACY_GUILD_ID}: "
+                      + ", ".join(f"{n} {table}" for table, n in moved.items()))
+            if merged:
+                with Session(bind=bind) as session:
+                    begin_write(session)
+                    rebuild_player_stats(session)
+                    session.commit()
+                print(f"Merged {merged} game(s) into guild {LEGACY_GUILD_ID}'s games of the same name; rebuilt ratings")
+        else:
+            with bind.connect() as conn:
+                pending = legacy_rows_pending(conn)
+            if pending:
+                print("WARNING: " + ", ".join(f"{n} {table}" for table, n in pending.items())
+                      + " predate per-guild storage and show in no server; set LEGACY_GUILD_ID to"
+                      " the server they belong to and restart to assign them")
+        if ensure_games_per_guild(bind):
+            print("Rebuilt games table: names and codes are now unique per guild")
+        new_indexes = ensure_indexes(bind)
+        if new_indexes:
+            print(f"Created indexes: {', '.join(new_indexes)}")
+        _migrated.add(bind)
+    SessionLocal.configure(bind=bind)
+    return bind
 
 # ------------- Helpers -------------
 def _norm_code(s: str) -> str:
     """Normalize to a lowercase, no-space short code (e.g., 'M a d d e n' -> 'madden')."""
     return "".join(str(s).lower().split())
 
+def guild_of(interaction: discord.Interaction) -> int:
+    """The guild whose games, seasons and matches a command reads and writes."""
+    return interaction.guild_id or DM_GUILD
+
+def display_name_of(member: discord.abc.User) -> str:
+    return getattr(member, "display_name", None) or getattr(member, "global_name", None) or member.name
+
 def upsert_user(session, member: discord.abc.User) -> User:
     """Create or update a User row, safely handling multiple references to the same user in one transaction."""
-    name = getattr(member, "display_name", None) or getattr(member, "global_name", None) or member.name
+    name = display_name_of(member)
 
     u = session.get(User, member.id)
     if u is None:
@@ -132,41 +969,216 @@ def upsert_user(session, member: discord.abc.User) -> User:
 
     return u
 
-def get_or_create_game(session, name_or_code: Optional[str]) -> Optional[Game]:
+class NameBuffer:
+    """Display names seen by read-only commands, written to `users` in periodic batches.
+
+    Keeps /record, /head2head and /leaderboard free of write transactions; only names
+    that differ from what this process last wrote are queued.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # user id -> newest display name not yet written
+        self._written = {}  # user id -> display name this process last wrote
+
+    def note(self, member: discord.abc.User):
+        name = display_name_of(member)
+        with self._lock:
+            if self._written.get(member.id) != name:
+                self._pending[member.id] = name
+
+    def flush(self, session) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        begin_write(session)
+        stmt = sqlite_insert(User)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.id],
+            set_={"display_name": stmt.excluded.display_name},
+            where=User.display_name != stmt.excluded.display_name,
+        )
+        try:
+            session.execute(stmt, [{"id": uid, "display_name": name} for uid, name in batch.items()])
+            session.commit()
+        except Exception:
+            with self._lock:
+                for uid, name in batch.items():
+                    self._pending.setdefault(uid, name)
+            raise
+        with self._lock:
+            self._written.update(batch)
+        return len(batch)
+
+name_buffer = NameBuffer()
+
+def resolve_names(session, user_ids) -> dict:
+    """Map user ids to display names in one query; unknown ids fall back to the id as text."""
+    ids = list(dict.fromkeys(user_ids))
+    names = {}
+    if ids:
+        names = dict(session.execute(select(User.id, User.display_name).where(User.id.in_(ids))).all())
+    return {uid: names.get(uid) or str(uid) for uid in ids}
+
+class GameRef(NamedTuple):
+    """Detached, immutable view of a Game row that is safe to share across threads."""
+    id: int
+    name: str
+    short_code: str
+    guild_id: int
+
+class GameRegistry:
+    """In-process index of every guild's games by (guild, normalized short code) and by
+    (guild, lowercased name).
+
+    Loaded once at startup and extended as games are created, so resolving a game on the
+    hot path costs no SQL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_code = {}
+        self._by_name = {}
+
+    def _add(self, ref: GameRef):
+        self._by_code[ref.guild_id, _norm_code(ref.short_code)] = ref
+        self._by_name[ref.guild_id, ref.name.lower()] = ref
+
+    def load(self, session) -> int:
+        rows = session.execute(select(Game.id, Game.name, Game.short_code, Game.guild_id)).all()
+        with self._lock:
+            self._by_code.clear()
+            self._by_name.clear()
+            for row in rows:
+                self._add(GameRef(*row))
+        return len(rows)
+
+    def add(self, ref: GameRef):
+        with self._lock:
+            self._add(ref)
+
+    def lookup(self, guild_id: int, name_or_code: str) -> Optional[GameRef]:
+        raw = name_or_code.strip()
+        with self._lock:
+            return self._by_code.get((guild_id, _norm_code(raw))) or self._by_name.get((guild_id, raw.lower()))
+
+game_registry = GameRegistry()
+
+def find_game(session, guild_id: int, name_or_code: Optional[str]) -> Optional[GameRef]:
+    """Resolve an existing game of a guild by code or name without ever writing."""
     if not name_or_code:
         return None
+    ref = game_registry.lookup(guild_id, name_or_code)
+    if ref:
+        return ref
     raw = name_or_code.strip()
     code = _norm_code(raw)  # lowercase, no spaces
-    # First try exact short_code match
-    q = session.execute(select(Game).where(func.lower(Game.short_code) == code)).scalar_one_or_none()
-    if q:
-        return q
-    # Then try case-insensitive name match
-    q = session.execute(select(Game).where(func.lower(Game.name) == raw.lower())).scalar_one_or_none()
-    if q:
-        return q
+    # Not cached yet (first sighting, or created before the registry loaded): check the table
+    in_guild = Game.guild_id == guild_id
+    q = session.execute(select(Game).where(in_guild, func.lower(Game.short_code) == code)).scalar_one_or_none()
+    if q is None:
+        q = session.execute(select(Game).where(in_guild, func.lower(Game.name) == raw.lower())).scalar_one_or_none()
+    if q is None:
+        return None
+    ref = GameRef(q.id, q.name, q.short_code, q.guild_id)
+    game_registry.add(ref)
+    return ref
+
+def get_or_create_game(session, guild_id: int, name_or_code: Optional[str]) -> Optional[GameRef]:
+    if not name_or_code:
+        return None
+    ref = find_game(session, guild_id, name_or_code)
+    if ref:
+        return ref
+    raw = name_or_code.strip()
+    code = _norm_code(raw)
     # Create new with normalized short_code and nice title name
-    g = Game(name=raw.title(), short_code=code)
+    g = Game(guild_id=guild_id, name=raw.title(), short_code=code)
     session.add(g)
     session.flush()
-    return g
-
-def find_active_season(session, name: Optional[str], game: Optional[Game]) -> Optional[Season]:
-    if name:
-        stmt = select(Season).where(func.lower(Season.name) == name.lower(), Season.status == "active")
-        if game:
-            stmt = stmt.where(or_(Season.game_id == None, Season.game_id == game.id))
-        return session.execute(stmt).scalar_one_or_none()
-    else:
-        stmt = select(Season).where(Season.status == "active")
-        if game:
-            stmt = stmt.where(or_(Season.game_id == None, Season.game_id == game.id))
-        return session.execute(stmt.order_by(Season.started_at.desc())).scalar_one_or_none()
+    ref = GameRef(g.id, g.name, g.short_code, g.guild_id)
+    on_commit(session, game_registry.add, ref)
+    return ref
+
+class SeasonRef(NamedTuple):
+    """Detached view of an active Season row."""
+    id: int
+    name: str
+    game_id: Optional[int]
+    started_at: Optional[datetime]
+    guild_id: int
+
+class ActiveSeasonCache:
+    """Active seasons per guild and game (game None = seasons not tied to a game), by lowercased name.
+
+    Active seasons only change through /season_start and /season_end, which call
+    `invalidate()` once they commit; everything else reads the in-memory map.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_guild = None  # {guild_id: {game_id: {name.lower(): SeasonRef}}}; None = reload on next read
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._by_guild = None
+            self._generation += 1
+
+    def _snapshot(self, session) -> dict:
+        with self._lock:
+            by_guild, gen = self._by_guild, self._generation
+        if by_guild is not None:
+            return by_guild
+        by_guild = {}
+        rows = session.execute(
+            select(Season.id, Season.name, Season.game_id, Season.started_at, Season.guild_id)
+            .where(Season.status == "active")
+            .order_by(Season.started_at, Season.id)
+        ).all()
+        for row in rows:
+            by_guild.setdefault(row.guild_id, {}).setdefault(row.game_id, {})[row.name.lower()] = SeasonRef(*row)
+        with self._lock:
+            if self._generation == gen:  # don't publish a load that raced an invalidation
+                self._by_guild = by_guild
+        return by_guild
+
+    def load(self, session) -> int:
+        self.invalidate()
+        return sum(len(names) for by_game in self._snapshot(session).values() for names in by_game.values())
+
+    def named(self, session, guild_id: int, name: str) -> list:
+        """Every active season called `name` in a guild, across its games."""
+        key = name.lower()
+        by_game = self._snapshot(session).get(guild_id, {})
+        return [names[key] for names in by_game.values() if key in names]
+
+    def find(self, session, guild_id: int, name: Optional[str], game_id: Optional[int]) -> Optional[SeasonRef]:
+        by_game = self._snapshot(session).get(guild_id, {})
+        if game_id is None:
+            candidates = [s for names in by_game.values() for s in names.values()]
+        else:
+            candidates = list(by_game.get(game_id, {}).values()) + list(by_game.get(None, {}).values())
+        if name:
+            key = name.lower()
+            # A game's own season wins over an all-games season of the same name
+            candidates = [s for s in candidates if s.name.lower() == key]
+            candidates.sort(key=lambda s: s.game_id is None)
+            return candidates[0] if candidates else None
+        return max(candidates, key=lambda s: (s.started_at or datetime.min, s.id), default=None)
+
+season_cache = ActiveSeasonCache()
 
-def season_filter_clause(game_id: Optional[int], season_name: Optional[str]):
+def find_active_season(session, guild_id: int, name: Optional[str], game: Optional[GameRef]) -> Optional[SeasonRef]:
+    return season_cache.find(session, guild_id, name, game.id if game else None)
+
+def season_filter_clause(guild_id: int, game_id: Optional[int], season_name: Optional[str]):
     def add_filters(stmt):
         if game_id:
-            stmt = stmt.where(Match.game_id == game_id)
+            stmt = stmt.where(Match.game_id == game_id)  # a game is one guild's already
+        else:
+            stmt = stmt.where(Match.guild_id == guild_id)
         if season_name:
             stmt = stmt.join(Season, Season.id == Match.season_id).where(
                 func.lower(Season.name) == season_name.lower()
@@ -177,51 +1189,1360 @@ def season_filter_clause(game_id: Optional[int], season_name: Optional[str]):
 def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
 
+def live_matches_subquery(guild_id: int, game_id: Optional[int], season_name: Optional[str]):
+    """A guild's verified, non-voided matches narrowed by the optional game/season filters."""
+    base = select(Match).where(Match.verified == True, Match.voided == False)
+    base = season_filter_clause(guild_id, game_id, season_name)(base)
+    return base.subquery()
+
+def pair_matches_stmt(game_id: int, a_id: int, b_id: int):
+    """Non-voided matches between two players in a game, either way round.
+
+    Written as two IN lists rather than OR'd pairs so SQLite can seek ix_matches_game_pair;
+    players never face themselves, so the extra (a, a)/(b, b) combinations never match.
+    """
+    pair = (a_id, b_id)
+    return select(Match).where(
+        Match.game_id == game_id,
+        Match.winner_id.in_(pair),
+        Match.loser_id.in_(pair),
+        Match.voided == False,
+    )
+
+def dupe_match_stmt(game_id: int, a_id: int, b_id: int, since: datetime):
+    return (
+        pair_matches_stmt(game_id, a_id, b_id)
+        .where(Match.played_at >= since)
+        .with_only_columns(Match.id)
+        .order_by(Match.id.desc())
+        .limit(1)
+    )
+
+def undo_candidate_stmt(guild_id: int, who_id: int):
+    q = select(Match).where(Match.guild_id == guild_id, Match.voided == False).order_by(Match.id.desc())
+    if not is_admin(who_id):
+        q = q.where(
+            Match.reporter_id == who_id,
+            Match.played_at >= now_utc() - timedelta(minutes=10)
+        )
+    return q
+
+class PlayerRecord(NamedTuple):
+    wins: int
+    losses: int
+    points_for: int
+    points_against: int
+    last_played: Optional[datetime]
+
+def player_record_stmt(guild_id: int, uid: int, vs_uid: Optional[int] = None,
+                       game_id: Optional[int] = None, season_name: Optional[str] = None):
+    """One aggregate query for a player's (or a head-to-head) record in a scope."""
+    if vs_uid:
+        sub = live_matches_subquery(guild_id, game_id, season_name)
+        won = sub.c.winner_id == uid
+        lost = sub.c.loser_id == uid
+        pair = (uid, vs_uid)
+        return select(
+            func.coalesce(func.sum(case((won, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((lost, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((won, sub.c.score_w), (lost, sub.c.score_l))), 0),
+            func.coalesce(func.sum(case((won, sub.c.score_l), (lost, sub.c.score_w))), 0),
+            func.max(sub.c.played_at),
+        ).where(sub.c.winner_id.in_(pair), sub.c.loser_id.in_(pair))
+    # A wins arm and a losses arm, each an equality seek on guild + winner / guild + loser. An OR
+    # of the two is only split into those seeks when ANALYZE stats say it's worth it; without
+    # them SQLite range-scans the whole game or guild.
+    filters = season_filter_clause(guild_id, game_id, season_name)
+    arms = [
+        filters(
+            select(literal(won).label("won"), pf.label("pf"), pa.label("pa"), Match.played_at)
+            .where(Match.guild_id == guild_id, side == uid, Match.verified == True, Match.voided == False)
+        )
+        for won, side, pf, pa in ((1, Match.winner_id, Match.score_w, Match.score_l),
+                                  (0, Match.loser_id, Match.score_l, Match.score_w))
+    ]
+    sub = union_all(*arms).subquery()
+    return select(
+        func.coalesce(func.sum(sub.c.won), 0),
+        func.coalesce(func.sum(1 - sub.c.won), 0),
+        func.coalesce(func.sum(sub.c.pf), 0),
+        func.coalesce(func.sum(sub.c.pa), 0),
+        func.max(sub.c.played_at),
+    )
+
+def player_record(session, guild_id: int, uid: int, vs_uid: Optional[int] = None,
+                  game_id: Optional[int] = None, season_name: Optional[str] = None) -> PlayerRecord:
+    """Wins, losses, score totals and last-played time for `uid` (optionally vs `vs_uid`) in one round trip."""
+    w, l, pf, pa, last = session.execute(player_record_stmt(guild_id, uid, vs_uid, game_id, season_name)).one()
+    return PlayerRecord(w or 0, l or 0, pf or 0, pa or 0, last)
+
+def format_record_extras(rec: PlayerRecord) -> str:
+    """Secondary line for a record: points for/against and a relative last-played timestamp."""
+    bits = []
+    if rec.points_for or rec.points_against:
+        bits.append(f"Points: {rec.points_for}–{rec.points_against}")
+    if rec.last_played:
+        last = rec.last_played if rec.last_played.tzinfo else rec.last_played.replace(tzinfo=timezone.utc)
+        bits.append(f"Last played <t:{int(last.timestamp())}:R>")
+    return ("\n" + " · ".join(bits)) if bits else ""
+
 def dupe_match_exists(session, game_id: int, a_id: int, b_id: int, window_minutes=5) -> Optional[int]:
     """Return most recent duplicate match id within window, if any."""
     since = now_utc() - timedelta(minutes=window_minutes)
-    stmt = (
-        select(Match.id)
-        .where(
-            Match.game_id == game_id,
-            Match.played_at >= since,
-            Match.voided == False,
-            or_(
-                and_(Match.winner_id == a_id, Match.loser_id == b_id),
-                and_(Match.winner_id == b_id, Match.loser_id == a_id),
-            ),
+    return session.execute(dupe_match_stmt(game_id, a_id, b_id, since)).scalars().first()
+
+def _hot_queries():
+    """Every hot Match query, and the seek on `matches` its plan must show for each table access,
+    in plan order: {index it may use: leading columns it must bind with `=`}."""
+    pair = {"ix_matches_game_pair": ("game_id", "winner_id")}
+    guild_pair = {"ix_matches_guild_winner": ("guild_id", "winner_id"), "ix_matches_guild_loser": ("guild_id", "loser_id")}
+    wins = {"ix_matches_guild_winner": ("guild_id", "winner_id")}
+    game_wins = {**wins, "ix_matches_game_pair": ("game_id", "winner_id")}  # equally selective; stats pick
+    losses = {"ix_matches_guild_loser": ("guild_id", "loser_id")}
+    return {
+        "dupe_match_exists": (dupe_match_stmt(1, 1, 2, now_utc()), [pair]),
+        "matchup_reset": (pair_matches_stmt(1, 1, 2), [pair]),
+        "record (game)": (player_record_stmt(1, 1, None, 1, None), [game_wins, losses]),
+        "record (all games)": (player_record_stmt(1, 1), [wins, losses]),
+        "head2head (game)": (player_record_stmt(1, 1, 2, 1, None), [pair]),
+        "head2head (all games)": (player_record_stmt(1, 1, 2), [guild_pair]),
+        "head2head (game, season)": (player_record_stmt(1, 1, 2, 1, "season"), [pair]),
+        "undo (reporter)": (undo_candidate_stmt(1, -1), [{"ix_matches_guild_reporter_live": ("guild_id", "reporter_id")}]),
+        "season_reset": (select(Match.id).where(Match.season_id == 1), [{"ix_matches_season": ("season_id",)}]),
+    }
+
+def explain_hot_queries(session) -> list:
+    """Run EXPLAIN QUERY PLAN on each hot query's real SQL: [(name, ok, plan_text)].
+
+    The statement is planned exactly as SQLAlchemy sends it, placeholders and all (left NULL:
+    without STAT4 statistics SQLite plans before it sees the values). A query is ok only if
+    each access to `matches` is a seek on its expected index, binding the expected columns.
+    """
+    results = []
+    for name, (stmt, expected) in _hot_queries().items():
+        sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True}))
+        plan = [row[-1] for row in session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count("?")
+        ).all()]
+        seeks = [d for d in plan if d.startswith(("SEARCH matches ", "SCAN matches"))]
+        ok = len(seeks) == len(expected)
+        for detail, seek in zip(seeks, expected):
+            index, _, bound = detail.partition(" INDEX ")[2].rstrip(")").partition(" (")
+            ok = ok and detail.startswith("SEARCH") and index in seek and all(
+                f"{col}=?" in bound.split(" AND ") for col in seek[index]
+            )
+        text = " | ".join(plan)
+        if not ok:
+            text += " — expected " + "; ".join(
+                " or ".join(f"{index} ({', '.join(cols)})" for index, cols in seek.items()) for seek in expected
+            )
+        results.append((name, ok, text))
+    return results
+
+# ----- Player stats (incremental leaderboard aggregate) -----
+def elo_delta(r_winner: float, r_loser: float, k: float = ELO_K) -> float:
+    """Rating points the winner gains (and the loser gives up) for one match."""
+    expected = 1 / (1 + 10 ** ((r_loser - r_winner) / 400))
+    return k * (1 - expected)
+
+def _stat_upsert(session, user_id: int, game_id: int, season_id: int, wins: int, losses: int, rating: float = 0.0):
+    stmt = sqlite_insert(PlayerStat).values(
+        user_id=user_id, game_id=game_id, season_id=season_id, wins=wins, losses=losses,
+        rating=ELO_START + rating,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlayerStat.user_id, PlayerStat.game_id, PlayerStat.season_id],
+        set_={
+            "wins": PlayerStat.wins + stmt.excluded.wins,
+            "losses": PlayerStat.losses + stmt.excluded.losses,
+            "rating": PlayerStat.rating + rating,
+        },
+    )
+    session.execute(stmt)
+    _queue_rank_refresh(session, game_id, season_id, user_id)
+
+def _queue_rank_refresh(session, game_id: int, season_id: int, user_id: int):
+    """Note a player whose totals changed; each (game, season) is refreshed once, at commit."""
+    hooks = session.info.setdefault("on_commit", [])
+    i, pending = session.info.get("rank_refresh", (-1, None))
+    # The batch's hook is gone after a commit or rollback, or a rolled-back savepoint that queued it
+    if not (0 <= i < len(hooks) and hooks[i][0] is _refresh_ranks and hooks[i][1][0] is pending):
+        pending = {}
+        session.info["rank_refresh"] = (len(hooks), pending)
+        on_commit(session, _refresh_ranks, pending)
+    pending.setdefault((game_id, season_id), set()).add(user_id)
+
+def _refresh_ranks(pending: dict):
+    # Unloaded scopes are skipped by refresh itself, but another worker may have them loaded
+    for (game_id, season_id), user_ids in pending.items():
+        user_ids = sorted(user_ids)
+        rank_index.refresh(game_id, season_id, user_ids)
+        cache_bus.share(rank_index.refresh, game_id, season_id, user_ids)
+
+def _match_scopes(season_id: Optional[int]):
+    """player_stats scopes a match counts in, paired with the Match column holding its Elo delta there."""
+    scopes = [(ALL_SEASONS, "elo_delta")]
+    if season_id:
+        scopes.append((season_id, "season_elo_delta"))
+    return scopes
+
+def apply_match_stats(session, m: Match):
+    """Count a new live match in player_stats and move both players' Elo, in the caller's transaction.
+
+    The rating change applied in each scope is stored on the match so it can be reversed exactly.
+    """
+    for sid, attr in _match_scopes(m.season_id):
+        ratings = dict(session.execute(
+            select(PlayerStat.user_id, PlayerStat.rating).where(
+                PlayerStat.game_id == m.game_id,
+                PlayerStat.season_id == sid,
+                PlayerStat.user_id.in_((m.winner_id, m.loser_id)),
+            )
+        ).all())
+        delta = elo_delta(ratings.get(m.winner_id, ELO_START), ratings.get(m.loser_id, ELO_START))
+        setattr(m, attr, delta)
+        _stat_upsert(session, m.winner_id, m.game_id, sid, 1, 0, delta)
+        _stat_upsert(session, m.loser_id, m.game_id, sid, 0, 1, -delta)
+
+def revert_match_stats(session, m: Match):
+    """Take a match that is being voided back out of player_stats, including its Elo change."""
+    for sid, attr in _match_scopes(m.season_id):
+        delta = getattr(m, attr) or 0.0
+        _stat_upsert(session, m.winner_id, m.game_id, sid, -1, 0, -delta)
+        _stat_upsert(session, m.loser_id, m.game_id, sid, 0, -1, delta)
+
+def rebuild_player_stats(session) -> int:
+    """Recompute player_stats (and every match's Elo deltas) by replaying `matches` in order.
+
+    Glicko-2 snapshots are dropped too; `run_glicko_periods` rates history again.
+    Returns the number of player_stats rows written; caller commits.
+    """
+    session.execute(delete(GlickoSnapshot))
+    session.execute(delete(PlayerStat))
+    on_commit_shared(session, rank_index.invalidate)
+    on_commit_shared(session, stats_cache.clear)
+    result = replay_elo(load_match_history(session))
+    if result.match_deltas:
+        session.execute(update(Match), result.match_deltas)
+    if result.slots:
+        session.execute(
+            sqlite_insert(PlayerStat),
+            [
+                {"user_id": uid, "game_id": gid, "season_id": sid, "wins": w, "losses": l, "rating": r}
+                for (uid, gid, sid), w, l, r in zip(result.slots, result.wins, result.losses, result.ratings)
+            ],
         )
-        .order_by(Match.id.desc())
-        .limit(1)
+    return len(result.slots)
+
+# ----- Rating replay (batch recompute from any point in history) -----
+class EloReplay(NamedTuple):
+    slots: list         # (user_id, game_id, season_id) per rating slot touched by the replay
+    ratings: list       # final rating per slot
+    wins: list          # wins per slot within the replayed matches
+    losses: list        # losses per slot within the replayed matches
+    match_deltas: list  # {"id", "elo_delta", "season_elo_delta"} per replayed match
+
+def load_match_history(session, game_id: Optional[int] = None, from_match_id: int = 0) -> list:
+    """Live matches as plain tuples in replay order, without building ORM objects:
+    (id, game_id, season_id or ALL_SEASONS, winner_id, loser_id, elo_delta, season_elo_delta).
+    """
+    stmt = (
+        select(Match.id, Match.game_id, func.coalesce(Match.season_id, ALL_SEASONS),
+               Match.winner_id, Match.loser_id, Match.elo_delta, Match.season_elo_delta)
+        .where(Match.verified == True, Match.voided == False, Match.id >= from_match_id)
+        .order_by(Match.id)
+    )
+    if game_id:
+        stmt = stmt.where(Match.game_id == game_id)
+    return session.execute(stmt).all()
+
+def replay_elo_naive(rows, current: Optional[dict] = None, k: float = ELO_K) -> EloReplay:
+    """Reference replay: one match at a time in plain Python.
+
+    `current` maps slot -> rating *after* every row; the rows' stored deltas are backed out of it
+    first, so a replay can start mid-history. Without it every slot starts at ELO_START.
+    """
+    slots = {}  # slot -> [wins, losses, rating]
+    for _, gid, sid, winner_id, loser_id, d_all, d_season in rows:
+        for scope, old in ((ALL_SEASONS, d_all), (sid, d_season)) if sid else ((ALL_SEASONS, d_all),):
+            for uid, sign in ((winner_id, -1), (loser_id, 1)):
+                slot = (uid, gid, scope)
+                if slot not in slots:
+                    slots[slot] = [0, 0, (current or {}).get(slot, ELO_START)]
+                if current:
+                    slots[slot][2] += sign * (old or 0.0)
+    deltas = []
+    for mid, gid, sid, winner_id, loser_id, _, _ in rows:
+        row = {"id": mid, "elo_delta": None, "season_elo_delta": None}
+        for scope, attr in _match_scopes(sid):
+            w = slots[(winner_id, gid, scope)]
+            l = slots[(loser_id, gid, scope)]
+            d = elo_delta(w[2], l[2], k)
+            w[0] += 1
+            w[2] += d
+            l[1] += 1
+            l[2] -= d
+            row[attr] = d
+        deltas.append(row)
+    keys = list(slots)
+    return EloReplay(
+        keys, [slots[s][2] for s in keys], [slots[s][0] for s in keys], [slots[s][1] for s in keys], deltas
     )
-    return session.execute(stmt).scalars().first()
+
+def replay_elo_vectorized(rows, current: Optional[dict] = None, k: float = ELO_K) -> EloReplay:
+    """Same result as `replay_elo_naive`, computed with NumPy in dependency levels.
+
+    Every match is split into rating events (game-wide, plus season when it has one) and every
+    (player, game, season) slot gets a dense index. An event's level is one more than the last
+    level that touched either of its slots, so events sharing a level never share a slot and
+    each level is a single vectorized Elo pass, in exactly the sequential order per slot.
+    """
+    if not rows:
+        return EloReplay([], [], [], [], [])
+    ids, gids, sids, wids, lids, d_all, d_season = zip(*rows)
+    ids = np.asarray(ids, dtype=np.int64)
+    gids = np.asarray(gids, dtype=np.int64)
+    sids = np.asarray(sids, dtype=np.int64)
+    wids = np.asarray(wids, dtype=np.int64)
+    lids = np.asarray(lids, dtype=np.int64)
+    n = len(ids)
+
+    # Events in replay order: each match's game-wide event, then its season event
+    seasonal = np.nonzero(sids != ALL_SEASONS)[0]
+    ev_row = np.concatenate([np.arange(n), seasonal])
+    ev_scope = np.concatenate([np.full(n, ALL_SEASONS, dtype=np.int64), sids[seasonal]])
+    ev_old = np.concatenate([np.asarray(d_all, dtype=float), np.asarray(d_season, dtype=float)[seasonal]])
+    order = np.argsort(ev_row, kind="stable")
+    ev_row, ev_scope, ev_old = ev_row[order], ev_scope[order], ev_old[order]
+    m = len(ev_row)
+
+    # Dense slot index for every (player, game, season) touched: densify each part with a 1-D
+    # unique, pack the three indexes into one int64 code, then densify the codes
+    users, u_inv = np.unique(np.concatenate([wids, lids]), return_inverse=True)
+    games, g_inv = np.unique(gids, return_inverse=True)
+    scopes, s_inv = np.unique(ev_scope, return_inverse=True)
+    n_g, n_s = len(games), len(scopes)
+    g_ev = g_inv.reshape(-1)[ev_row]
+    s_ev = s_inv.reshape(-1)
+    u_inv = u_inv.reshape(-1)
+    w_code = (u_inv[:n][ev_row] * n_g + g_ev) * n_s + s_ev
+    l_code = (u_inv[n:][ev_row] * n_g + g_ev) * n_s + s_ev
+    codes, inv = np.unique(np.concatenate([w_code, l_code]), return_inverse=True)
+    inv = inv.reshape(-1)
+    ws, ls = inv[:m], inv[m:]
+    slot_keys = list(zip(
+        users[codes // (n_g * n_s)].tolist(),
+        games[(codes // n_s) % n_g].tolist(),
+        scopes[codes % n_s].tolist(),
+    ))
+
+    if current:
+        ratings = np.array([current.get(s, ELO_START) for s in slot_keys], dtype=float)
+        old = np.nan_to_num(ev_old)
+        np.subtract.at(ratings, ws, old)
+        np.add.at(ratings, ls, old)
+    else:
+        ratings = np.full(len(slot_keys), ELO_START, dtype=float)
+
+    # Dependency levels (the only sequential step: integer bookkeeping, no float math)
+    last = [0] * len(slot_keys)
+    level = []
+    push = level.append
+    for a, b in zip(ws.tolist(), ls.tolist()):
+        la, lb = last[a], last[b]
+        lv = (la if la > lb else lb) + 1
+        last[a] = lv
+        last[b] = lv
+        push(lv)
+    level = np.asarray(level, dtype=np.int64)
+    by_level = np.argsort(level, kind="stable")
+    bounds = np.searchsorted(level[by_level], np.arange(1, int(level.max()) + 2))
+
+    new = np.empty(m, dtype=float)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        e = by_level[lo:hi]
+        a, b = ws[e], ls[e]
+        d = k * (1 - 1 / (1 + 10 ** ((ratings[b] - ratings[a]) / 400)))
+        ratings[a] += d  # no slot repeats within a level, so fancy-index += is safe
+        ratings[b] -= d
+        new[e] = d
+
+    delta_all = np.full(n, np.nan)
+    delta_season = np.full(n, np.nan)
+    is_season = ev_scope != ALL_SEASONS
+    delta_all[ev_row[~is_season]] = new[~is_season]
+    delta_season[ev_row[is_season]] = new[is_season]
+    season_out = delta_season.astype(object)
+    season_out[np.isnan(delta_season)] = None
+    deltas = [
+        {"id": mid, "elo_delta": da, "season_elo_delta": ds}
+        for mid, da, ds in zip(ids.tolist(), delta_all.tolist(), season_out.tolist())
+    ]
+    size = len(slot_keys)
+    return EloReplay(
+        slot_keys,
+        ratings.tolist(),
+        np.bincount(ws, minlength=size).tolist(),
+        np.bincount(ls, minlength=size).tolist(),
+        deltas,
+    )
+
+# Average dependency-level width below which the NumPy replay loses to the plain loop
+REPLAY_VECTOR_MIN_WIDTH = 128
+
+def replay_elo(rows, current: Optional[dict] = None, k: float = ELO_K) -> EloReplay:
+    """Replay with the engine that suits the history's shape.
+
+    The vectorized replay pays a NumPy pass per dependency level, so it only wins when levels
+    are wide. Average width runs at about a quarter of the (player, game) slots, which is cheap
+    to count up front: small pools, like most per-game recomputes, replay one match at a time.
+    """
+    if np is None:
+        return replay_elo_naive(rows, current, k)
+    slots = {(r[3], r[1]) for r in rows}
+    slots.update((r[4], r[1]) for r in rows)
+    if len(slots) / 4 < REPLAY_VECTOR_MIN_WIDTH:
+        return replay_elo_naive(rows, current, k)
+    return replay_elo_vectorized(rows, current, k)
+
+def recompute_ratings(session, game_id: int, from_match_id: int) -> int:
+    """Replay one game's Elo from `from_match_id` onward after history changed there.
+
+    Relies on player_stats.rating == ELO_START + the signed sum of stored deltas of live matches,
+    so only the suffix of history is loaded. Returns the number of matches replayed.
+    """
+    rows = load_match_history(session, game_id, from_match_id)
+    if not rows:
+        return 0
+    current = {
+        (uid, game_id, sid): rating
+        for uid, sid, rating in session.execute(
+            select(PlayerStat.user_id, PlayerStat.season_id, PlayerStat.rating).where(PlayerStat.game_id == game_id)
+        ).all()
+    }
+    result = replay_elo(rows, current)
+    session.execute(update(Match), result.match_deltas)
+    session.execute(
+        update(PlayerStat),
+        [
+            {"user_id": uid, "game_id": gid, "season_id": sid, "rating": r}
+            for (uid, gid, sid), r in zip(result.slots, result.ratings)
+        ],
+    )
+    return len(rows)
+
+def backfill_player_stats(session) -> int:
+    """Populate player_stats once for databases that predate it (or predate its Elo column)."""
+    begin_write(session)
+    if session.execute(select(Match.id).limit(1)).first() is None:
+        return 0
+    has_rows = session.execute(select(PlayerStat.user_id).limit(1)).first() is not None
+    if has_rows and "player_stats.rating" not in added_columns:
+        return 0
+    n = rebuild_player_stats(session)
+    session.commit()
+    return n
+
+# ----- Glicko-2 rating periods (batch job) -----
+GLICKO_START = 1500.0
+GLICKO_START_RD = 350.0
+GLICKO_START_VOL = 0.06
+GLICKO_SCALE = 173.7178  # Glicko <-> Glicko-2 scale factor
+GLICKO_EPOCH = datetime(1970, 1, 1)  # game-wide periods count from here (naive UTC, as stored)
+
+def glicko_window(period_days: Optional[float] = None) -> timedelta:
+    return timedelta(days=period_days or GLICKO_PERIOD_DAYS)
+
+def glicko_rd_now(rd: float, vol: float, period_end: datetime, window: timedelta, now: Optional[datetime] = None) -> float:
+    """RD as of now: Glicko-2 widens an idle player's RD once for every full period they sat out."""
+    now = now or now_utc().replace(tzinfo=None)
+    idle = max(0, (now - period_end) // window)
+    phi = math.sqrt((rd / GLICKO_SCALE) ** 2 + idle * vol ** 2)
+    return min(phi * GLICKO_SCALE, GLICKO_START_RD)
+
+def _glicko_volatility(delta, phi, v, sigma, tau: float = GLICKO_TAU, eps: float = 1e-6):
+    """Glicko-2 step 5: new volatility by Illinois root-finding, iterated for all players at once."""
+    a = np.log(sigma ** 2)
+    d2, p2 = delta ** 2, phi ** 2
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (d2 - p2 - v - ex) / (2 * (p2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    big = d2 > p2 + v
+    k = np.ones_like(a)
+    low = ~big & (f(a - tau) < 0)
+    while low.any():
+        k[low] += 1
+        low &= f(a - k * tau) < 0
+    A = a
+    B = np.where(big, np.log(np.where(big, d2 - p2 - v, 1.0)), a - k * tau)
+    fA, fB = f(A), f(B)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(100):
+            active = np.abs(B - A) > eps
+            if not active.any():
+                break
+            C = A + (A - B) * fA / (fB - fA)
+            fC = f(C)
+            swap = active & (fC * fB <= 0)
+            A = np.where(swap, B, A)
+            fA = np.where(swap, fB, np.where(active, fA / 2, fA))
+            B = np.where(active, C, B)
+            fB = np.where(active, fC, fB)
+    return np.exp(A / 2)
+
+def glicko_period(mu, phi, sigma, player, opponent, score):
+    """One Glicko-2 rating period, on the Glicko-2 scale.
+
+    mu/phi/sigma hold each competitor's pre-period state; every game result is one
+    (player, opponent, score) entry, so a match contributes an entry for each side.
+    Returns the post-period (mu, phi, sigma).
+    """
+    n = len(mu)
+    g = 1 / np.sqrt(1 + 3 * phi[opponent] ** 2 / np.pi ** 2)
+    e = 1 / (1 + np.exp(-g * (mu[player] - mu[opponent])))
+    v = 1 / np.bincount(player, weights=g * g * e * (1 - e), minlength=n)
+    score_sum = np.bincount(player, weights=g * (score - e), minlength=n)
+    new_sigma = _glicko_volatility(v * score_sum, phi, v, sigma)
+    phi_star = np.sqrt(phi ** 2 + new_sigma ** 2)
+    new_phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+    return mu + new_phi ** 2 * score_sum, new_phi, new_sigma
+
+def _latest_glicko(session, game_id: int, season_id: int, user_ids=None) -> dict:
+    """user_id -> (rating, rd, volatility, period_end) from each player's newest snapshot in a scope."""
+    scope = [GlickoSnapshot.game_id == game_id, GlickoSnapshot.season_id == season_id]
+    if user_ids is not None:
+        scope.append(GlickoSnapshot.user_id.in_(user_ids))
+    newest = (
+        select(GlickoSnapshot.user_id, func.max(GlickoSnapshot.period_end).label("period_end"))
+        .where(*scope)
+        .group_by(GlickoSnapshot.user_id)
+        .subquery()
+    )
+    rows = session.execute(
+        select(GlickoSnapshot.user_id, GlickoSnapshot.rating, GlickoSnapshot.rd,
+               GlickoSnapshot.volatility, GlickoSnapshot.period_end)
+        .join(newest, and_(GlickoSnapshot.user_id == newest.c.user_id,
+                           GlickoSnapshot.period_end == newest.c.period_end))
+        .where(*scope)
+    ).all()
+    return {uid: (r, rd, vol, end) for uid, r, rd, vol, end in rows}
+
+def _copy_glicko_to_stats(session, game_id: int, season_id: int, states: dict):
+    """Mirror snapshot states (user_id -> (rating, rd, volatility, period_end) or None) onto player_stats."""
+    if states:
+        session.execute(update(PlayerStat), [
+            {"user_id": uid, "game_id": game_id, "season_id": season_id,
+             "glicko_rating": st[0] if st else None, "glicko_rd": st[1] if st else None,
+             "glicko_vol": st[2] if st else None, "glicko_period_end": st[3] if st else None}
+            for uid, st in states.items()
+        ])
+
+def rate_glicko_scope(session, game_id: int, season_id: int, anchor: datetime, window: timedelta,
+                      now: datetime) -> int:
+    """Rate every closed, not yet rated period of one (game, season) scope. Returns snapshots written.
+
+    Periods are `window` long, counted from `anchor`; only periods that ended before `now` are
+    rated. Each period is a single vectorized Glicko-2 pass over everyone who played in it.
+    """
+    anchor = anchor.replace(tzinfo=None)
+    scope = (GlickoSnapshot.game_id == game_id, GlickoSnapshot.season_id == season_id)
+    rated_until = session.execute(select(func.max(GlickoSnapshot.period_end)).where(*scope)).scalar()
+    open_from = anchor + ((now - anchor) // window) * window  # start of the period still running
+    stmt = (
+        select(Match.played_at, Match.winner_id, Match.loser_id)
+        .where(Match.verified == True, Match.voided == False, Match.game_id == game_id,
+               Match.played_at < open_from)
+        .order_by(Match.played_at, Match.id)
+    )
+    if season_id != ALL_SEASONS:
+        stmt = stmt.where(Match.season_id == season_id)
+    if rated_until is not None:
+        stmt = stmt.where(Match.played_at >= rated_until)
+    rows = session.execute(stmt).all()
+    if not rows:
+        return 0
+
+    played, winners, losers = zip(*rows)
+    step = np.timedelta64(int(window.total_seconds() * 1_000_000), "us")
+    period = (np.array(played, dtype="datetime64[us]") - np.datetime64(anchor, "us")) // step
+    winners = np.asarray(winners, dtype=np.int64)
+    losers = np.asarray(losers, dtype=np.int64)
+
+    # user_id -> [mu, phi, sigma, last period played], on the Glicko-2 scale
+    state = {
+        uid: [(r - GLICKO_START) / GLICKO_SCALE, rd / GLICKO_SCALE, vol, (end - anchor) // window - 1]
+        for uid, (r, rd, vol, end) in _latest_glicko(session, game_id, season_id).items()
+    }
+    max_phi = GLICKO_START_RD / GLICKO_SCALE
+    starts = np.flatnonzero(np.diff(period, prepend=period[0] - 1)).tolist() + [len(period)]
+    snapshots = []
+    for lo, hi in zip(starts[:-1], starts[1:]):
+        p, k = int(period[lo]), hi - lo
+        players, inv = np.unique(np.concatenate([winners[lo:hi], losers[lo:hi]]), return_inverse=True)
+        inv = inv.reshape(-1)
+        mu = np.zeros(len(players))
+        phi = np.full(len(players), max_phi)
+        sigma = np.full(len(players), GLICKO_START_VOL)
+        for i, uid in enumerate(players.tolist()):
+            st = state.get(uid)
+            if st:
+                mu[i], sigma[i] = st[0], st[2]
+                phi[i] = min(math.sqrt(st[1] ** 2 + (p - st[3] - 1) * st[2] ** 2), max_phi)
+        player = np.concatenate([inv[:k], inv[k:]])
+        opponent = np.concatenate([inv[k:], inv[:k]])
+        score = np.concatenate([np.ones(k), np.zeros(k)])
+        mu, phi, sigma = glicko_period(mu, phi, sigma, player, opponent, score)
+        games = np.bincount(player, minlength=len(players))
+
+        end = anchor + (p + 1) * window
+        for uid, m, f, s, n in zip(players.tolist(), mu.tolist(), phi.tolist(), sigma.tolist(), games.tolist()):
+            state[uid] = [m, f, s, p]
+            snapshots.append({
+                "user_id": uid, "game_id": game_id, "season_id": season_id, "period_end": end,
+                "rating": GLICKO_START + GLICKO_SCALE * m, "rd": GLICKO_SCALE * f, "volatility": s, "games": n,
+            })
+
+    session.execute(sqlite_insert(GlickoSnapshot), snapshots)
+    latest = {}
+    for snap in snapshots:
+        latest[snap["user_id"]] = (snap["rating"], snap["rd"], snap["volatility"], snap["period_end"])
+    _copy_glicko_to_stats(session, game_id, season_id, latest)
+    return len(snapshots)
+
+def run_glicko_periods(session, game_id: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """Rate the closed periods of every scope in player_stats (or one game's). Caller commits.
+
+    Game-wide scopes use GLICKO_PERIOD_DAYS from GLICKO_EPOCH; a season's periods start at its
+    start date and use its own rating_period_days when set. Returns snapshots written.
+    """
+    if np is None:
+        raise RuntimeError("Glicko-2 rating periods need numpy installed.")
+    now = now or now_utc().replace(tzinfo=None)
+    stmt = select(PlayerStat.game_id, PlayerStat.season_id).distinct()
+    if game_id:
+        stmt = stmt.where(PlayerStat.game_id == game_id)
+    scopes = session.execute(stmt).all()
+    season_ids = {sid for _, sid in scopes if sid != ALL_SEASONS}
+    seasons = {s.id: s for s in session.execute(select(Season).where(Season.id.in_(season_ids))).scalars()}
+    written = 0
+    for gid, sid in scopes:
+        if sid == ALL_SEASONS:
+            written += rate_glicko_scope(session, gid, sid, GLICKO_EPOCH, glicko_window(), now)
+        elif sid in seasons:
+            s = seasons[sid]
+            written += rate_glicko_scope(session, gid, sid, s.started_at, glicko_window(s.rating_period_days), now)
+    return written
+
+def invalidate_glicko(session, game_id: int, season_ids, since: datetime) -> int:
+    """Drop snapshots for periods ending after `since` in these scopes of a game, because
+    match history changed at `since`. Affected players fall back to their last remaining
+    snapshot until the periods are rated again. Returns the number of (player, scope) pairs affected.
+    """
+    season_ids = list(season_ids)
+    stale = (
+        GlickoSnapshot.game_id == game_id,
+        GlickoSnapshot.season_id.in_(season_ids),
+        GlickoSnapshot.period_end > since.replace(tzinfo=None),
+    )
+    affected = session.execute(select(GlickoSnapshot.user_id, GlickoSnapshot.season_id).where(*stale).distinct()).all()
+    if not affected:
+        return 0
+    session.execute(delete(GlickoSnapshot).where(*stale))
+    by_scope = defaultdict(list)
+    for uid, sid in affected:
+        by_scope[sid].append(uid)
+    for sid, uids in by_scope.items():
+        remaining = _latest_glicko(session, game_id, sid, uids)
+        _copy_glicko_to_stats(session, game_id, sid, {uid: remaining.get(uid) for uid in uids})
+    return len(affected)
+
+def glicko_history_changed(session, game_id: int, season_ids, since: datetime):
+    """Re-rate already-rated periods after matches from `since` on were voided or deleted, in the caller's transaction."""
+    if invalidate_glicko(session, game_id, season_ids, since) and np is not None:
+        run_glicko_periods(session, game_id)
+
+def seasons_named(session, guild_id: int, season_name: str, game_id: Optional[int] = None) -> list:
+    """(id, rating_period_days) of every season of a guild called `season_name` (any status),
+    narrowed to a game's when given."""
+    stmt = select(Season.id, Season.rating_period_days).where(
+        Season.guild_id == guild_id, func.lower(Season.name) == season_name.lower()
+    )
+    if game_id:
+        stmt = stmt.where(or_(Season.game_id == None, Season.game_id == game_id))
+    return session.execute(stmt).all()
+
+def season_ids_named(session, guild_id: int, season_name: str, game_id: Optional[int] = None) -> list:
+    """Ids of every season of a guild called `season_name` (any status), narrowed to a game's when given."""
+    return [sid for sid, _ in seasons_named(session, guild_id, season_name, game_id)]
+
+class BoardRow(NamedTuple):
+    user_id: int
+    wins: int
+    losses: int
+    win_pct: float
+    rating: Optional[float]
+
+LEADERBOARD_PAGE_SIZE = 10
+
+def board_key(row: BoardRow, sort: str = "record") -> tuple:
+    """A row's position in the leaderboard ORDER BY, used as a keyset pagination cursor."""
+    return (row.rating, row.user_id) if sort == "elo" else (row.wins, row.losses, row.user_id)
+
+def _keyset(cols, cursor, backwards: bool = False):
+    """Predicate for rows strictly after `cursor` (before it when `backwards`) in ORDER BY `cols`.
+
+    `cols` is [(expr, descending)] in ORDER BY order; `cursor` has one value per column.
+    """
+    clauses = []
+    for i, (expr, descending) in enumerate(cols):
+        ties = [c == v for (c, _), v in zip(cols[:i], cursor)]
+        clauses.append(and_(*ties, expr < cursor[i] if descending != backwards else expr > cursor[i]))
+    # The redundant bound on the leading column lets SQLite seek the index to the cursor
+    lead, descending = cols[0]
+    return and_(lead <= cursor[0] if descending != backwards else lead >= cursor[0], or_(*clauses))
+
+def leaderboard_rows(session, guild_id: int, game_id: Optional[int], season_name: Optional[str], limit: int = 10,
+                     sort: str = "record", after: Optional[tuple] = None, before: Optional[tuple] = None,
+                     offset: int = 0) -> list:
+    """Top players for a scope of one guild, read from player_stats.
+
+    sort="record" orders by wins desc, losses asc; sort="elo" orders by rating and needs a game,
+    since ratings from different games aren't comparable. `after`/`before` take a `board_key`
+    cursor and return the `limit` rows just past it either way (keyset pagination; rows come
+    back in leaderboard order both ways); `offset` skips rows for a direct page jump.
+    """
+    stmt_scope = []
+    if game_id:
+        stmt_scope.append(PlayerStat.game_id == game_id)
+    else:
+        # All games: the guild's games, each an index seek on ix_player_stats_board
+        stmt_scope.append(PlayerStat.game_id.in_(select(Game.id).where(Game.guild_id == guild_id)))
+    if season_name:
+        season_ids = season_ids_named(session, guild_id, season_name, game_id)
+        if not season_ids:
+            return []
+        stmt_scope.append(PlayerStat.season_id.in_(season_ids))
+    else:
+        season_ids = None
+        stmt_scope.append(PlayerStat.season_id == ALL_SEASONS)
+
+    if game_id and (season_ids is None or len(season_ids) == 1):
+        # One row per player: walk ix_player_stats_board / ix_player_stats_elo in order
+        w, l, r = PlayerStat.wins, PlayerStat.losses, PlayerStat.rating
+        stmt = select(PlayerStat.user_id, w, l, r).where(*stmt_scope, (w + l) > 0)
+        grouped = False
+    else:
+        if sort == "elo" and not game_id:
+            raise ValueError("Pick a game to rank by Elo.")
+        # Several scopes per player (all games, or same-named seasons): sum the record and,
+        # for Elo, rank each player by their best season rating
+        w = func.sum(PlayerStat.wins)
+        l = func.sum(PlayerStat.losses)
+        r = func.max(PlayerStat.rating) if sort == "elo" else null()
+        stmt = select(PlayerStat.user_id, w, l, r).where(*stmt_scope).group_by(PlayerStat.user_id).having((w + l) > 0)
+        grouped = True
+
+    if sort == "elo":
+        cols = [(r, True), (PlayerStat.user_id, False)]
+    else:
+        cols = [(w, True), (l, False), (PlayerStat.user_id, False)]
+    for cursor, backwards in ((after, False), (before, True)):
+        if cursor is not None:
+            pred = _keyset(cols, cursor, backwards)
+            stmt = stmt.having(pred) if grouped else stmt.where(pred)
+    backwards = before is not None
+    stmt = (
+        stmt.order_by(*[expr.desc() if descending != backwards else expr.asc() for expr, descending in cols])
+        .offset(offset)
+        .limit(limit)
+    )
+
+    rows = []
+    for uid, w, l, rating in session.execute(stmt).all():
+        winp = (w / (w + l)) * 100 if (w + l) > 0 else 0.0
+        rows.append(BoardRow(uid, w, l, winp, rating if game_id else None))
+    if backwards:
+        rows.reverse()
+    return rows
+
+class BoardPage(NamedTuple):
+    rows: list      # BoardRow in leaderboard order
+    start: int      # rank of rows[0]
+    has_prev: bool
+    has_next: bool
+
+def leaderboard_page(session, guild_id: int, game_id: Optional[int], season_name: Optional[str], sort: str = "record",
+                     page: int = 1, after: Optional[BoardRow] = None, before: Optional[BoardRow] = None,
+                     start: int = 1, size: int = LEADERBOARD_PAGE_SIZE) -> BoardPage:
+    """One leaderboard page: page `page` by number, or the page following `after` / preceding
+    `before` (keyset, from a row on screen; `start` is that row's rank). Reads one row past the
+    page to know whether there is more, never the rest of the ranking.
+    """
+    if after is not None or before is not None:
+        cursor = board_key(after or before, sort)
+        rows = leaderboard_rows(session, guild_id, game_id, season_name, size + 1, sort,
+                                after=cursor if after is not None else None,
+                                before=cursor if before is not None else None)
+    else:
+        rows = leaderboard_rows(session, guild_id, game_id, season_name, size + 1, sort, offset=(page - 1) * size)
+        start = (page - 1) * size + 1
+    more = len(rows) > size
+    if before is not None:
+        rows = rows[-size:]
+        return BoardPage(rows, start - len(rows) if more else 1, more, True)
+    rows = rows[:size]
+    if after is not None:
+        return BoardPage(rows, start + 1, True, more)
+    return BoardPage(rows, start, page > 1, more)
+
+def player_stat(session, guild_id: int, uid: int, game_id: int, season_name: Optional[str]):
+    """A player's player_stats row for one of a guild's games (optionally one season) and that
+    scope's Glicko-2 period length, or (None, None) if they're unrated there.
+    """
+    if season_name:
+        seasons = seasons_named(session, guild_id, season_name, game_id)
+        if len(seasons) != 1:
+            return None, None
+        sid, period_days = seasons[0]
+    else:
+        sid, period_days = ALL_SEASONS, None
+    st = session.get(PlayerStat, (uid, game_id, sid))
+    if not st or not (st.wins or st.losses):
+        return None, None
+    return st, glicko_window(period_days)
+
+# ----- Rank index (player's place on the record leaderboard) -----
+class RankPlace(NamedTuple):
+    rank: int
+    total: int
+    above: Optional[tuple]  # (user_id, wins, losses) of the player ranked just above, if any
+    below: Optional[tuple]  # ... and just below
+
+class RankIndex:
+    """Leaderboard order (wins desc, losses asc, user id) of every (game, season) scope, in memory.
+
+    A scope is loaded from player_stats the first time it's asked for. After that, every commit
+    that changes players' totals re-reads just their rows, once per scope (`refresh`, batched by
+    `_queue_rank_refresh` and relayed to the other cluster workers), so a rank is a binary
+    search rather than a sort of the whole scope. Loads and refreshes read through their own
+    connection to the database the scope was loaded from, while holding the lock, so they apply
+    in commit order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (game_id, season_id) -> (sorted keys, {user_id: key}, bind); key = (-wins, losses, user_id)
+        self._scopes = {}
+
+    def invalidate(self, season_id: Optional[int] = None):
+        """Forget every scope (or one season's scopes); they reload on next use."""
+        with self._lock:
+            if season_id is None:
+                self._scopes.clear()
+            else:
+                for scope in [s for s in self._scopes if s[1] == season_id]:
+                    del self._scopes[scope]
+
+    def refresh(self, game_id: int, season_id: int, user_ids):
+        """Re-read some players' totals after a commit; no-op unless their scope is loaded."""
+        with self._lock:
+            scope = self._scopes.get((game_id, season_id))
+            if scope is None:
+                return
+            keys, by_user, bind = scope
+            with bind.connect() as conn:
+                rows = dict((uid, (w, l)) for uid, w, l in conn.execute(
+                    select(PlayerStat.user_id, PlayerStat.wins, PlayerStat.losses).where(
+                        PlayerStat.game_id == game_id,
+                        PlayerStat.season_id == season_id,
+                        PlayerStat.user_id.in_(user_ids),
+                    )
+                ))
+            for uid in user_ids:
+                old = by_user.pop(uid, None)
+                if old is not None:
+                    del keys[bisect.bisect_left(keys, old)]
+                w, l = rows.get(uid, (0, 0))
+                if w or l:
+                    by_user[uid] = (-w, l, uid)
+                    bisect.insort(keys, by_user[uid])
+
+    def _scope(self, bind, game_id: int, season_id: int):
+        # Caller holds the lock
+        scope = self._scopes.get((game_id, season_id))
+        if scope is None:
+            with bind.connect() as conn:
+                rows = conn.execute(
+                    select(PlayerStat.user_id, PlayerStat.wins, PlayerStat.losses).where(
+                        PlayerStat.game_id == game_id,
+                        PlayerStat.season_id == season_id,
+                        (PlayerStat.wins + PlayerStat.losses) > 0,
+                    )
+                ).all()
+            by_user = {uid: (-w, l, uid) for uid, w, l in rows}
+            scope = self._scopes[(game_id, season_id)] = (sorted(by_user.values()), by_user, bind)
+        return scope
+
+    def place(self, session, game_id: int, season_id: int, user_id: int) -> Optional[RankPlace]:
+        """A player's rank in one scope with their neighbours, or None if they haven't played there."""
+        with self._lock:
+            keys, by_user, _ = self._scope(session.get_bind(), game_id, season_id)
+            key = by_user.get(user_id)
+            if key is None:
+                return None
+            i = bisect.bisect_left(keys, key)
+
+            def neighbour(j):
+                if 0 <= j < len(keys):
+                    neg_w, l, uid = keys[j]
+                    return uid, -neg_w, l
+                return None
+
+            return RankPlace(i + 1, len(keys), neighbour(i - 1), neighbour(i + 1))
+
+rank_index = RankIndex()
+
+# ----- Cluster (worker processes sharing one database) -----
+class CacheBus:
+    """A worker's link to the launcher's ClusterHub, relaying committed cache updates.
+
+    `on_commit_shared` runs a cache hook locally and `share`s it; every other worker then runs the
+    same hook (looked up by registered name) when the line arrives. Without CLUSTER_BUS it's a no-op.
+    """
+
+    def __init__(self):
+        self.hooks = {}   # name -> hook, run when another worker shares it
+        self._names = {}  # hook -> name
+        self._loop = None
+        self._writer = None
+        self._task = None
+        self._on_lost = None
+        self.sent = 0
+        self.received = 0
+
+    def register(self, name: str, fn):
+        self.hooks[name] = fn
+        self._names[fn] = name
+
+    def share(self, fn, *args):
+        self.publish(self._names[fn], *args)
+
+    def publish(self, name: str, *args):
+        """Send one message to every other worker; safe to call from any thread."""
+        if self._writer is None:
+            return
+        line = (json.dumps([name, *args]) + "\n").encode()
+        self._loop.call_soon_threadsafe(self._writer.write, line)
+        self.sent += 1
+
+    async def connect(self, address: str, on_lost=None):
+        host, port = address.rsplit(":", 1)
+        reader, self._writer = await asyncio.open_connection(host, int(port))
+        self._loop = asyncio.get_running_loop()
+        self._on_lost = on_lost
+        self._task = asyncio.create_task(self._listen(reader))
+
+    async def _listen(self, reader):
+        try:
+            while line := await reader.readline():
+                name, *args = json.loads(line)
+                self.received += 1
+                hook = self.hooks.get(name)
+                if hook is not None:
+                    # Off the event loop (a rank refresh reads SQL), one at a time to keep commit order
+                    await asyncio.to_thread(hook, *args)
+        finally:
+            self._writer = None
+            if self._on_lost is not None:
+                self._on_lost()
+
+    async def close(self):
+        self._on_lost = None  # closing on purpose
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+cache_bus = CacheBus()
+cache_bus.register("stats_cache.invalidate", stats_cache.invalidate)
+cache_bus.register("stats_cache.clear", stats_cache.clear)
+cache_bus.register("season_cache.invalidate", season_cache.invalidate)
+cache_bus.register("rank_index.invalidate", rank_index.invalidate)
+cache_bus.register("rank_index.refresh", rank_index.refresh)
+# game_registry needs no relay: a miss falls back to SQL, and games are never renamed or removed
+
+class ClusterHub:
+    """The launcher's relay: each line a worker sends is written, in order, to every other worker."""
+
+    def __init__(self):
+        self._workers = set()
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Listen on localhost and return the "host:port" workers connect to."""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return f"{host}:{self._server.sockets[0].getsockname()[1]}"
+
+    async def _serve(self, reader, writer):
+        self._workers.add(writer)
+        try:
+            while line := await reader.readline():
+                for other in self._workers:
+                    if other is not writer:
+                        other.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            self._workers.discard(writer)
+            writer.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._workers):
+            writer.close()
+
+def shard_ranges(shard_count: int, workers: int) -> list:
+    """Split shards 0..shard_count-1 into `workers` contiguous, near-equal ranges."""
+    workers = max(1, min(workers, shard_count))
+    return [list(range(i * shard_count // workers, (i + 1) * shard_count // workers)) for i in range(workers)]
+
+async def recommended_shard_count(token: str) -> int:
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shards, _, _ = await http.get_bot_gateway()
+        return shards
+    finally:
+        await http.close()
+
+async def run_cluster(workers: int) -> int:
+    """`python bot.py --cluster N`: run the bot as N worker processes, each owning a shard range.
+
+    Migrations and the player_stats backfill run here once, so workers start against an
+    up-to-date database. Workers that exit are restarted.
+    """
+    shard_count = int(SHARD_COUNT) if SHARD_COUNT.isdigit() else await recommended_shard_count(TOKEN)
+    init_storage()
+    session = SessionLocal()
+    try:
+        n = backfill_player_stats(session)
+        if n:
+            print(f"Backfilled {n} player_stats rows from match history")
+    finally:
+        SessionLocal.remove()
+
+    hub = ClusterHub()
+    address = await hub.start()
+    ranges = shard_ranges(shard_count, workers)
+    print(f"Cluster: {len(ranges)} workers, {shard_count} shards, cache relay on {address}")
+    procs = {}
+    stopping = asyncio.Event()
+
+    async def supervise(i: int):
+        flags = ["--force-sync"] if i == 0 and "--force-sync" in sys.argv else []  # worker 0 syncs commands
+        env = dict(os.environ, SHARD_COUNT=str(shard_count), SHARD_IDS=",".join(map(str, ranges[i])),
+                   CLUSTER_WORKER=str(i), CLUSTER_BUS=address)
+        while not stopping.is_set():
+            procs[i] = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), *flags, env=env)
+            print(f"Worker {i} (shards {ranges[i][0]}-{ranges[i][-1]}) started, pid {procs[i].pid}")
+            code = await procs[i].wait()
+            if stopping.is_set():
+                break
+            print(f"Worker {i} exited with code {code}; restarting in 5s")
+            try:
+                await asyncio.wait_for(stopping.wait(), 5)
+            except asyncio.TimeoutError:
+                pass
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+    supervisors = [asyncio.create_task(supervise(i)) for i in range(len(ranges))]
+    try:
+        await stopping.wait()
+    finally:
+        stopping.set()
+        for p in procs.values():
+            if p.returncode is None:
+                p.terminate()
+        for p in procs.values():
+            try:
+                await asyncio.wait_for(p.wait(), 30)
+            except asyncio.TimeoutError:
+                p.kill()
+        await asyncio.gather(*supervisors, return_exceptions=True)
+        await hub.close()
+    return 0
+
+# ----- Metrics endpoint (Prometheus text format, local only) -----
+def _prom_histogram(lines: list, name: str, labels: str, h: Histogram, scale: float = 1.0):
+    cumulative = 0
+    for bound, n in zip(h.bounds, h.counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{{labels},le="{bound * scale:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+    lines.append(f"{name}_sum{{{labels}}} {h.total * scale:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+def render_prometheus() -> str:
+    snap = perf.snapshot()
+    lines = [
+        "# HELP scoreboard_command_seconds App command latency by phase (total, defer, db, send, sql).",
+        "# TYPE scoreboard_command_seconds histogram",
+    ]
+    for (command, phase), h in sorted(snap["latency"].items()):
+        _prom_histogram(lines, "scoreboard_command_seconds", f'command="{command}",phase="{phase}"', h, 0.001)
+    lines += ["# HELP scoreboard_command_sql_queries SQL statements run per app command.",
+              "# TYPE scoreboard_command_sql_queries histogram"]
+    for command, h in sorted(snap["queries"].items()):
+        _prom_histogram(lines, "scoreboard_command_sql_queries", f'command="{command}"', h)
+    lines += ["# HELP scoreboard_sql_statement_seconds Latency of single SQL statements, by command.",
+              "# TYPE scoreboard_sql_statement_seconds histogram"]
+    for command, h in sorted(snap["statements"].items()):
+        _prom_histogram(lines, "scoreboard_sql_statement_seconds", f'command="{command}"', h, 0.001)
+    lines += ["# HELP scoreboard_command_errors_total App commands that ended in an error.",
+              "# TYPE scoreboard_command_errors_total counter"]
+    for command, n in sorted(snap["errors"].items()):
+        lines.append(f'scoreboard_command_errors_total{{command="{command}"}} {n}')
+    lines += ["# HELP scoreboard_shard_interaction_seconds App command latency by gateway shard.",
+              "# TYPE scoreboard_shard_interaction_seconds histogram"]
+    for shard, (h, _) in sorted(snap["shards"].items()):
+        _prom_histogram(lines, "scoreboard_shard_interaction_seconds", f'shard="{shard}"', h, 0.001)
+    lines += ["# HELP scoreboard_shard_gateway_latency_seconds Gateway heartbeat latency by shard.",
+              "# TYPE scoreboard_shard_gateway_latency_seconds gauge"]
+    for shard, latency in sorted(shard_latencies().items()):
+        lines.append(f'scoreboard_shard_gateway_latency_seconds{{shard="{shard}"}} {latency:.6f}')
+
+    st, cs = db.stats(), stats_cache.stats()
+    gauges = {
+        "scoreboard_db_queued": st["queued"], "scoreboard_db_running": st["running"],
+        "scoreboard_stats_cache_entries": cs["size"],
+    }
+    counters = {
+        "scoreboard_db_calls_total": st["calls"], "scoreboard_db_errors_total": st["errors"],
+        "scoreboard_stats_cache_hits_total": cs["hits"], "scoreboard_stats_cache_misses_total": cs["misses"],
+        "scoreboard_stats_cache_evictions_total": cs["evictions"],
+        "scoreboard_stats_cache_invalidations_total": cs["invalidations"],
+    }
+    for kind, values in (("gauge", gauges), ("counter", counters)):
+        for name, value in values.items():
+            lines += [f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+async def start_metrics_server(port: int) -> "web.AppRunner":
+    from aiohttp import web  # only needed with METRICS_PORT; a noticeable share of import time
+
+    async def metrics(_request):
+        return web.Response(text=render_prometheus(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
 
 # ------------- Bot -------------
-class RecordsBot(commands.Bot):
+def shard_of(guild_id: Optional[int]) -> int:
+    """Gateway shard that receives a guild's events (Discord's formula); DMs arrive on shard 0."""
+    return (guild_id >> 22) % (bot.shard_count or 1) if guild_id else 0
+
+def shard_latencies() -> dict:
+    """Gateway heartbeat latency (seconds) per connected shard; shard 0 only when unsharded."""
+    pairs = bot.latencies if isinstance(bot, discord.AutoShardedClient) else [(0, bot.latency)]
+    return {shard: latency for shard, latency in pairs if not math.isnan(latency) and not math.isinf(latency)}
+
+class TimedTree(app_commands.CommandTree):
+    """Command tree that starts a perf trace for every app command before it runs."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        name = (interaction.data or {}).get("name", "?")
+        interaction.extras["trace"] = perf.start(name, shard_of(interaction.guild_id))
+        return True
+
+# ----- Slash command sync -----
+# Last synced command payload hash per (application, guild or global), so restarts skip the upload.
+# Defaults to a file next to DB_PATH; on Heroku that's /tmp, which every dyno restart wipes, so
+# point COMMAND_SYNC_PATH somewhere that survives restarts (e.g. a mounted volume) to skip syncs there.
+COMMAND_SYNC_PATH = os.getenv("COMMAND_SYNC_PATH") or os.path.join(os.path.dirname(DB_PATH), "command_sync.json")
+
+def command_tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """SHA-256 of the command payload `tree.sync(guild=guild)` would upload."""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def load_sync_hashes() -> dict:
+    try:
+        with open(COMMAND_SYNC_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_sync_hashes(hashes: dict):
+    tmp = COMMAND_SYNC_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    os.replace(tmp, COMMAND_SYNC_PATH)
+
+# Sharded or not, everything runs on one event loop in one process, so the shards share the DB
+# pool, report writer and caches (all keyed by guild) exactly as a single connection would
+_BotBase = commands.AutoShardedBot if SHARD_COUNT else commands.Bot
+
+class RecordsBot(_BotBase):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=INTENTS)
+        shards = {}
+        if SHARD_COUNT.isdigit() and int(SHARD_COUNT) > 0:
+            shards["shard_count"] = int(SHARD_COUNT)
+        elif SHARD_COUNT not in ("", "auto"):
+            raise ValueError(f"SHARD_COUNT must be a positive number or 'auto', not {SHARD_COUNT!r}")
+        if SHARD_IDS:
+            if "shard_count" not in shards:
+                raise ValueError("SHARD_IDS needs a numeric SHARD_COUNT")
+            shards["shard_ids"] = SHARD_IDS
+        super().__init__(command_prefix="!", intents=INTENTS, tree_cls=TimedTree, http_trace=discord_http_trace(),
+                         **shards)
+        self._metrics_runner = None
+        self.force_sync = False  # --force-sync: upload commands even if they match the last sync
+
+    async def login(self, token: str):
+        self._login_started = time.perf_counter()
+        await super().login(token)
 
     async def setup_hook(self):
+        # Client.login() awaits setup_hook itself, after static_login and application_info: time
+        # just those here, or "login" would also count every phase below
+        startup.record("login", time.perf_counter() - self._login_started)
+        # In a cluster the command tree is global state, so only worker 0 syncs it
+        if CLUSTER_WORKER == 0:
+            with startup.phase("command sync"):
+                await self.sync_commands()
+
+        if CLUSTER_BUS:
+            # Connect before loading caches so no update committed in between is missed
+            with startup.phase("cache relay"):
+                await cache_bus.connect(CLUSTER_BUS, on_lost=self._cache_bus_lost)
+            print(f"Worker {CLUSTER_WORKER}: shards {SHARD_IDS}, cache relay {CLUSTER_BUS}")
+        with startup.phase("cache load"):
+            await db.run(game_registry.load)
+            await db.run(season_cache.load)
+        if not CLUSTER_BUS:  # the cluster launcher backfills once before starting workers
+            with startup.phase("player_stats backfill"):
+                n = await db.run(backfill_player_stats)
+            if n:
+                print(f"Backfilled {n} player_stats rows from match history")
+
+        self._name_flusher = asyncio.create_task(self._flush_names_forever())
+        if METRICS_PORT:
+            port = METRICS_PORT + CLUSTER_WORKER
+            with startup.phase("metrics server"):
+                self._metrics_runner = await start_metrics_server(port)
+            print(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+        # Glicko periods are rated once per database, so in a cluster worker 0 runs them
+        run_glicko = np is not None and CLUSTER_WORKER == 0
+        self._glicko_runner = asyncio.create_task(self._rate_periods_forever()) if run_glicko else None
+        report_writer.start()
+
+    async def sync_commands(self) -> bool:
+        """Upload the slash commands, unless they hash the same as the last upload from here.
+
+        Syncing is a rate-limited HTTP round trip per scope, so unchanged restarts skip it. The
+        hashes live in the local JSON file at COMMAND_SYNC_PATH, not in Discord or the database:
+        if that file is lost (a wiped /tmp on a dyno restart), the next start syncs again.
+        """
         # Fast sync to one guild if provided (speeds up slash availability)
-        if GUILD_ID and GUILD_ID.isdigit():
-            guild = discord.Object(id=int(GUILD_ID))
+        guild = discord.Object(id=int(GUILD_ID)) if GUILD_ID and GUILD_ID.isdigit() else None
+        if guild is not None:
             self.tree.copy_global_to(guild=guild)
-            await self.tree.sync(guild=guild)
-        else:
-            await self.tree.sync()
+        key = f"{self.application_id}:{guild.id if guild else 'global'}"
+        digest = command_tree_hash(self.tree, guild)
+        hashes = load_sync_hashes()
+        if not self.force_sync and hashes.get(key) == digest:
+            print("Slash commands unchanged since the last sync; skipping (use --force-sync to upload anyway)")
+            return False
+        await self.tree.sync(guild=guild)
+        hashes[key] = digest
+        try:
+            save_sync_hashes(hashes)
+        except OSError as e:
+            print(f"Couldn't save the command sync hash ({e}); the next start will sync again")
+        return True
+
+    def _cache_bus_lost(self):
+        # Without the relay this worker's caches would go stale; exit and let the launcher restart it
+        if not self.is_closed():
+            print(f"Worker {CLUSTER_WORKER}: lost the cache relay, shutting down")
+            asyncio.create_task(self.close())
+
+    async def _flush_names_forever(self):
+        while True:
+            await asyncio.sleep(NAME_FLUSH_SECONDS)
+            try:
+                await db.run(name_buffer.flush)
+            except Exception:
+                import traceback
+                traceback.print_exc()
+
+    async def _rate_periods_forever(self):
+        # Glicko-2 is rated per closed period, so a periodic batch job is all it needs
+        while True:
+            try:
+                n = await db.run(_glicko_tx)
+                if n:
+                    print(f"Rated Glicko-2 periods: {n} snapshots")
+            except Exception:
+                import traceback
+                traceback.print_exc()
+            await asyncio.sleep(GLICKO_RUN_MINUTES * 60)
+
+    async def close(self):
+        for task in (getattr(self, "_name_flusher", None), getattr(self, "_glicko_runner", None)):
+            if task:
+                task.cancel()
+        await report_writer.stop()
+        await cache_bus.close()
+        if self._metrics_runner:
+            await self._metrics_runner.cleanup()
+        try:
+            await db.run(name_buffer.flush)
+        except Exception:
+            pass
+        await super().close()
+        db.shutdown()
+
+bot: Optional[RecordsBot] = None  # created by create_bot()
 
-bot = RecordsBot()
-
-@bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user} (id: {bot.user.id})")
+    startup.ready()
+    shards = f", {bot.shard_count} shards" if isinstance(bot, discord.AutoShardedClient) else ""
+    print(f"✅ Logged in as {bot.user} (id: {bot.user.id}{shards})")
     try:
         await bot.change_presence(activity=discord.Game(name="/help"))
     except Exception:
         pass
 
+async def on_shard_ready(shard_id: int):
+    print(f"Shard {shard_id} ready")
+
+async def on_shard_disconnect(shard_id: int):
+    print(f"Shard {shard_id} disconnected")
+
+async def on_shard_resumed(shard_id: int):
+    print(f"Shard {shard_id} resumed")
+
 # ----- Error handler & healthcheck -----
-@bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: Exception):
     import traceback
     traceback.print_exc()
@@ -232,15 +2553,202 @@ async def on_app_command_error(interaction: discord.Interaction, error: Exceptio
             await interaction.followup.send(f"❌ Command error: {error}", ephemeral=True)
     except Exception:
         pass
+    trace = interaction.extras.pop("trace", None)
+    if trace:
+        perf.finish(trace, failed=True)
 
-@bot.tree.command(name="ping", description="Health check")
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    trace = interaction.extras.pop("trace", None)
+    if trace:
+        perf.finish(trace)
+
+@app_commands.command(name="ping", description="Health check")
 async def ping(interaction: discord.Interaction):
     await interaction.response.send_message("pong", ephemeral=True)
 
 # ----- Slash Commands -----
 
+def _apply_report(session, guild_id, reporter, winner, loser, game, score_w, score_l, season) -> str:
+    """Stage one reported match in a guild (flushed, not committed) and return its confirmation text."""
+    g = get_or_create_game(session, guild_id, game)
+
+    # Ensure users exist / names updated (dedup across reporter/winner/loser)
+    for m in {reporter.id: reporter, winner.id: winner, loser.id: loser}.values():
+        upsert_user(session, m)
+
+    u_reporter = session.get(User, reporter.id)
+    u_winner   = session.get(User, winner.id)
+    u_loser    = session.get(User, loser.id)
+
+    # Auto-correct reversed scores
+    if score_w is not None and score_l is not None and score_w < score_l:
+        score_w, score_l = score_l, score_w
+        u_winner, u_loser = u_loser, u_winner
+
+    s = find_active_season(session, guild_id, season, g) if season else None
+
+    # Silent dupe check (log-only)
+    dupe = dupe_match_exists(session, g.id, u_winner.id, u_loser.id)
+
+    m = Match(
+        guild_id=guild_id,
+        game_id=g.id,
+        season_id=s.id if s else None,
+        reporter_id=u_reporter.id,
+        winner_id=u_winner.id,
+        loser_id=u_loser.id,
+        score_w=score_w,
+        score_l=score_l,
+        verified=True,
+        voided=False,
+        dupe_of=dupe if dupe else None
+    )
+    apply_match_stats(session, m)
+    session.add(m)
+    on_commit_shared(session, stats_cache.invalidate, guild_id, g.id, [s.name] if s else [], (m.winner_id, m.loser_id))
+
+    action = f"report match {u_winner.display_name} vs {u_loser.display_name} in {g.short_code}"
+    if dupe:
+        action += f" [dupe_of:{dupe}]"
+    session.add(AuditLog(guild_id=guild_id, who_id=u_reporter.id, action=action))
+    session.flush()
+
+    label = f"{g.name}" + (f" — {s.name}" if s else "")
+    score_txt = f" {m.score_w}-{m.score_l}" if (m.score_w is not None and m.score_l is not None) else ""
+    return (
+        f"✅ Recorded: **{u_winner.display_name}** beat **{u_loser.display_name}**{score_txt} in **{label}**. Match ID: `{m.id}`"
+    )
+
+def _report_tx(session, guild_id, reporter, winner, loser, game, score_w, score_l, season) -> str:
+    begin_write(session)
+    text = _apply_report(session, guild_id, reporter, winner, loser, game, score_w, score_l, season)
+    session.commit()
+    return text
+
+def _report_batch_tx(session, batch: list) -> list:
+    """Apply many reports in one transaction; each gets a SAVEPOINT so one failure can't sink the rest.
+
+    Returns one (ok, text_or_exception) per report, in order.
+    """
+    begin_write(session)
+    results = []
+    for args in batch:
+        hooks = len(session.info.get("on_commit", []))
+        try:
+            with session.begin_nested():
+                results.append((True, _apply_report(session, *args)))
+        except Exception as e:
+            # Drop cache updates queued by the rolled-back report (e.g. a game it created), and
+            # forget every loaded object: rows it inserted can otherwise linger in the identity
+            # map as "persistent" and later reports would skip re-creating them
+            del session.info.get("on_commit", [])[hooks:]
+            session.expunge_all()
+            results.append((False, e.with_traceback(None)))
+    session.commit()
+    return results
+
+# ----- Group-commit writer for /report -----
+class ReportWriter:
+    """Single writer task that commits /report requests in micro-batches.
+
+    Reports are queued from handlers; the writer takes the first waiting report, gives the
+    burst up to REPORT_BATCH_WINDOW_MS (or until REPORT_BATCH_MAX are queued) to fill, then
+    commits them together. Each caller still gets its own match ID or error.
+    """
+
+    def __init__(self, max_batch: int, window_ms: float):
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000
+        self._queue = None
+        self._full = None
+        self._task = None
+        self._stopping = False
+        self.batches = 0
+        self.reports = 0
+        self.largest = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Let the writer finish its batch and drain the queue, then end it.
+
+        Never cancels the writer: a batch whose transaction is in flight still commits,
+        and cancelling would leave its callers without an answer.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._full.set()
+        self._queue.put_nowait(None)  # wakes a writer idle on an empty queue
+        await self._task
+        self._task = None
+        # Reports submitted while the writer was finishing up
+        while not self._queue.empty():
+            batch = self._take(self.max_batch, [])
+            if batch:
+                await self._commit(batch)
+
+    async def submit(self, *args) -> str:
+        if self._task is None:  # writer not running (e.g. tooling): commit inline
+            return await db.run(_report_tx, *args)
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((args, fut))
+        if self._queue.qsize() >= self.max_batch:
+            self._full.set()
+        started = time.perf_counter()
+        try:
+            return await fut
+        finally:
+            # The batch's SQL is the writer's ("background"); the wait is this command's DB time
+            trace = current_trace.get()
+            if trace is not None:
+                trace.db += time.perf_counter() - started
+
+    def _take(self, limit: int, batch: list) -> list:
+        while len(batch) < limit and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:  # skip stop()'s wake-up
+                batch.append(item)
+        return batch
+
+    async def _commit(self, batch: list):
+        try:
+            results = await db.run(_report_batch_tx, [args for args, _ in batch])
+        except Exception as e:
+            results = [(False, e)] * len(batch)
+        self.batches += 1
+        self.reports += len(batch)
+        self.largest = max(self.largest, len(batch))
+        for (_, fut), (ok, value) in zip(batch, results):
+            if fut.done():
+                continue
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+    async def _run(self):
+        while not (self._stopping and self._queue.empty()):
+            item = await self._queue.get()
+            if item is None:
+                continue
+            batch = [item]
+            if self.window and not self._stopping and self._queue.qsize() + 1 < self.max_batch:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+            await self._commit(self._take(self.max_batch, batch))
+
+report_writer = ReportWriter(REPORT_BATCH_MAX, REPORT_BATCH_WINDOW_MS)
+
 # Public: /report (silent dupe detection, log-only)
-@bot.tree.command(name="report", description="Record a match result (win/loss).")
+@app_commands.command(name="report", description="Record a match result (win/loss).")
 @app_commands.describe(
     game="Game name or code (e.g., 'madden')",
     winner="Select winner",
@@ -262,63 +2770,207 @@ async def report(
         return await interaction.response.send_message("Winner and loser must be different users.")
 
     await interaction.response.defer()
-    session = SessionLocal()
-
     try:
-        g = get_or_create_game(session, game)
-
-        # Ensure users exist / names updated (dedup across reporter/winner/loser)
-        for m in {interaction.user.id: interaction.user, winner.id: winner, loser.id: loser}.values():
-            upsert_user(session, m)
-
-        u_reporter = session.get(User, interaction.user.id)
-        u_winner   = session.get(User, winner.id)
-        u_loser    = session.get(User, loser.id)
-
-        # Auto-correct reversed scores
-        if score_w is not None and score_l is not None and score_w < score_l:
-            score_w, score_l = score_l, score_w
-            u_winner, u_loser = u_loser, u_winner
-
-        s = find_active_season(session, season, g) if season else None
-
-        # Silent dupe check (log-only)
-        dupe = dupe_match_exists(session, g.id, u_winner.id, u_loser.id)
-
-        m = Match(
-            game_id=g.id,
-            season_id=s.id if s else None,
-            reporter_id=u_reporter.id,
-            winner_id=u_winner.id,
-            loser_id=u_loser.id,
-            score_w=score_w,
-            score_l=score_l,
-            verified=True,
-            voided=False,
-            dupe_of=dupe if dupe else None
+        text = await report_writer.submit(
+            guild_of(interaction), interaction.user, winner, loser, game, score_w, score_l, season
         )
-        session.add(m)
-
-        action = f"report match {u_winner.display_name} vs {u_loser.display_name} in {g.short_code}"
-        if dupe:
-            action += f" [dupe_of:{dupe}]"
-        session.add(AuditLog(who_id=u_reporter.id, action=action))
+        await interaction.followup.send(text)
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error recording match: {e}")
 
-        session.commit()
+def _record_tx(session, guild_id, game, user, vs, season, sort: str = "record") -> str:
+    g = find_game(session, guild_id, game) if game else None
+    if game and g is None:
+        return f"No matches recorded yet for **{game.strip()}**."
+    game_id = g.id if g else None
+
+    g_label = g.name if g else "All Games"
+    s_label = f", Season: {season}" if season else ""
+
+    # Read-only: names come from the interaction; NameBuffer persists any changes later
+    if user and vs:
+        rec = player_record(session, guild_id, user.id, vs.id, game_id, season)
+        text = (
+            f"**Head-to-Head** {g_label}{s_label}\n{display_name_of(user)} vs {display_name_of(vs)}: "
+            f"**{rec.wins}–{rec.losses}**" + format_record_extras(rec)
+        )
 
-        label = f"{g.name}" + (f" — {s.name}" if s else "")
-        score_txt = f" {m.score_w}-{m.score_l}" if (m.score_w is not None and m.score_l is not None) else ""
-        await interaction.followup.send(
-            f"✅ Recorded: **{u_winner.display_name}** beat **{u_loser.display_name}**{score_txt} in **{label}**. Match ID: `{m.id}`"
+    elif user:
+        rec = player_record(session, guild_id, user.id, None, game_id, season)
+        text = (
+            f"**Record** ({g_label}{s_label}) for **{display_name_of(user)}**: "
+            f"**{rec.wins}–{rec.losses}**" + format_record_extras(rec)
         )
+        st, window = player_stat(session, guild_id, user.id, game_id, season) if game_id else (None, None)
+        if st is not None:
+            text += f"\nElo: **{st.rating:.0f}**"
+            if st.glicko_rating is not None:
+                rd = glicko_rd_now(st.glicko_rd, st.glicko_vol, st.glicko_period_end, window)
+                text += f" · Glicko-2: **{st.glicko_rating:.0f} ± {2 * rd:.0f}**"
+            place = rank_index.place(session, game_id, st.season_id, user.id)
+            if place:
+                near = [p for p in (place.above, place.below) if p]
+                names = resolve_names(session, [p[0] for p in near])
+                text += f"\nRank **{place.rank:,}** of **{place.total:,}**"
+                if place.above:
+                    text += f" · above: {names[place.above[0]]} ({place.above[1]}–{place.above[2]})"
+                if place.below:
+                    text += f" · below: {names[place.below[0]]} ({place.below[1]}–{place.below[2]})"
+
+    else:
+        # Leaderboard (Top 10) from the precomputed player_stats aggregate
+        if sort == "elo" and not game_id:
+            return "Pick a game to rank by Elo (ratings from different games aren't comparable)."
+        rows = leaderboard_rows(session, guild_id, game_id, season, limit=LEADERBOARD_PAGE_SIZE, sort=sort)
+        text = format_leaderboard(session, BoardPage(rows, 1, False, False), sort, g_label, season)
+
+    return text
+
+def format_leaderboard(session, page: BoardPage, sort: str, g_label: str, season: Optional[str]) -> str:
+    if not page.rows:
+        scope = g_label + (f", Season: {season}" if season else "")
+        if page.start > 1:
+            return f"No players ranked that far down ({scope})."
+        return f"No matches recorded yet for that scope ({scope})."
+    names = resolve_names(session, [r.user_id for r in page.rows])
+    if sort == "elo":
+        lines = [
+            f"{i}. **{names[r.user_id]}** — {r.rating:.0f} ({r.wins}–{r.losses})"
+            for i, r in enumerate(page.rows, page.start)
+        ]
+    else:
+        lines = [
+            f"{i}. **{names[r.user_id]}** — {r.wins}–{r.losses} ({r.win_pct:.0f}%)"
+            for i, r in enumerate(page.rows, page.start)
+        ]
+    s_tag = f" — Season: {season}" if season else ""
+    e_tag = " (Elo)" if sort == "elo" else ""
+    if page.start == 1:
+        title = f"Top {LEADERBOARD_PAGE_SIZE}"
+    else:
+        title = f"Ranks {page.start}–{page.start + len(page.rows) - 1}"
+    return f"**{title}{e_tag} — {g_label}{s_tag}**\n" + "\n".join(lines)
+
+def _leaderboard_tx(session, guild_id, game, season, sort: str = "record", page: int = 1,
+                    after: Optional[BoardRow] = None, before: Optional[BoardRow] = None, start: int = 1):
+    """(text, BoardPage or None) for one /leaderboard page; see `leaderboard_page` for the paging args."""
+    g = find_game(session, guild_id, game) if game else None
+    if game and g is None:
+        return f"No matches recorded yet for **{game.strip()}**.", None
+    if sort == "elo" and not g:
+        return "Pick a game to rank by Elo (ratings from different games aren't comparable).", None
+    board = leaderboard_page(session, guild_id, g.id if g else None, season, sort, page, after, before, start)
+    return format_leaderboard(session, board, sort, g.name if g else "All Games", season), board
+
+def stats_key(command: str, guild_id: int, game: Optional[str], season: Optional[str], *rest) -> tuple:
+    """Cache/singleflight key for a read-only stats request: spellings of the same game share a key."""
+    ref = game_registry.lookup(guild_id, game) if game else None
+    game_key = ref.id if ref else (_norm_code(game) if game else None)
+    return (command, guild_id, game_key, season.strip() if season else None, *rest)
+
+def stats_scope(guild_id: int, game: Optional[str], season: Optional[str], user_id: Optional[int] = None,
+                vs_id: Optional[int] = None) -> Optional[StatsScope]:
+    """What a stats request depends on, or None (don't cache) if its game isn't known yet."""
+    ref = game_registry.lookup(guild_id, game) if game else None
+    if game and ref is None:
+        return None
+    return StatsScope(guild_id, ref.id if ref else None, season.strip().lower() if season else None, user_id, vs_id)
+
+async def cached_stats(key, scope: Optional[StatsScope], fn, *args, **kwargs):
+    """`db.run(fn, ...)` for a stats response, served from stats_cache when possible and
+    otherwise shared with identical in-flight requests."""
+    if scope is not None:
+        hit = stats_cache.get(key)
+        if hit is not None:
+            return hit
+    return await stats_flight.run(key, _fill_stats, key, scope, fn, *args, **kwargs)
+
+async def _fill_stats(key, scope: Optional[StatsScope], fn, *args, **kwargs):
+    generation = stats_cache.generation
+    value = await db.run(fn, *args, **kwargs)
+    if scope is not None:
+        stats_cache.put(key, scope, value, generation)
+    return value
+
+async def send_stats(
+    interaction: discord.Interaction,
+    game: Optional[str] = None,
+    user: Optional[discord.User] = None,
+    vs: Optional[discord.User] = None,
+    season: Optional[str] = None,
+    sort: str = "record",
+):
+    """Shared body of /record, /head2head and /leaderboard."""
+    # Public response
+    await interaction.response.defer()
+    for m in (user, vs):
+        if m is not None:
+            name_buffer.note(m)
+    try:
+        guild_id = guild_of(interaction)
+        user_id, vs_id = (user.id if user else None), (vs.id if vs else None)
+        key = stats_key("record", guild_id, game, season, user_id, vs_id, sort)
+        scope = stats_scope(guild_id, game, season, user_id, vs_id)
+        text = await cached_stats(key, scope, _record_tx, guild_id, game, user, vs, season, sort)
+        await interaction.followup.send(text)
     except Exception as e:
-        session.rollback()
-        await interaction.followup.send(f"❌ Error recording match: {e}")
-    finally:
-        session.close()
+        await interaction.followup.send(f"❌ Error: {e}")
+
+class LeaderboardView(discord.ui.View):
+    """Prev/next buttons under a /leaderboard page; each press fetches the neighbouring page by
+    keyset from the rows on screen."""
+
+    def __init__(self, guild_id: int, game: Optional[str], season: Optional[str], sort: str, board: BoardPage):
+        super().__init__(timeout=LEADERBOARD_VIEW_SECONDS)
+        self.guild_id, self.game, self.season, self.sort = guild_id, game, season, sort
+        self.board = board
+        self.message = None
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.prev_page.disabled = not (self.board.rows and self.board.has_prev)
+        self.next_page.disabled = not (self.board.rows and self.board.has_next)
+
+    async def _turn(self, interaction: discord.Interaction, **cursor):
+        await interaction.response.defer()
+        try:
+            key = stats_key("leaderboard", self.guild_id, self.game, self.season, self.sort, tuple(sorted(cursor.items())))
+            text, board = await cached_stats(
+                key, stats_scope(self.guild_id, self.game, self.season),
+                _leaderboard_tx, self.guild_id, self.game, self.season, self.sort, **cursor
+            )
+        except Exception as e:
+            return await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+        if board is not None and board.rows:
+            self.board = board
+        else:
+            text = None  # ranking shrank under us; keep the page on screen
+        self._sync_buttons()
+        if text:
+            await interaction.edit_original_response(content=text, view=self)
+        else:
+            await interaction.edit_original_response(view=self)
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, before=self.board.rows[0], start=self.board.start)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last = self.board.start + len(self.board.rows) - 1
+        await self._turn(interaction, after=self.board.rows[-1], start=last)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
 
 # Public: /record (player, h2h, or leaderboard if no user given)
-@bot.tree.command(name="record", description="Show a player's record, head-to-head, or a top-10 leaderboard.")
+@app_commands.command(name="record", description="Show a player's record, head-to-head, or a top-10 leaderboard.")
 @app_commands.describe(
     game="Game name/code (optional)",
     user="Player to summarize (optional)",
@@ -332,114 +2984,10 @@ async def record(
     vs: Optional[discord.User] = None,
     season: Optional[str] = None
 ):
-    # Public response
-    await interaction.response.defer()
-    session = SessionLocal()
-    try:
-        g = get_or_create_game(session, game) if game else None
-        add_filters = season_filter_clause(g.id if g else None, season)
-
-        # Base scope: verified & not voided, plus optional game/season filters
-        base = select(Match).where(Match.verified == True, Match.voided == False)
-        base = add_filters(base)
-        base_sub = base.subquery()
-
-        def wl_for(uid: int, vs_uid: Optional[int]) -> Tuple[int, int]:
-            if vs_uid:
-                wins = session.execute(
-                    select(func.count())
-                    .select_from(base_sub)
-                    .where(
-                        base_sub.c.winner_id == uid,
-                        base_sub.c.loser_id == vs_uid,
-                    )
-                ).scalar()
-                losses = session.execute(
-                    select(func.count())
-                    .select_from(base_sub)
-                    .where(
-                        base_sub.c.winner_id == vs_uid,
-                        base_sub.c.loser_id == uid,
-                    )
-                ).scalar()
-            else:
-                wins = session.execute(
-                    select(func.count()).select_from(base_sub).where(base_sub.c.winner_id == uid)
-                ).scalar()
-                losses = session.execute(
-                    select(func.count()).select_from(base_sub).where(base_sub.c.loser_id == uid)
-                ).scalar()
-            return (wins or 0), (losses or 0)
-
-        g_label = g.name if g else "All Games"
-        s_label = f", Season: {season}" if season else ""
-
-        if user and vs:
-            # Ensure names exist/are up to date
-            for m in {user.id: user, vs.id: vs}.values():
-                upsert_user(session, m)
-            u1 = session.get(User, user.id)
-            u2 = session.get(User, vs.id)
-            w, l = wl_for(u1.id, u2.id)
-            await interaction.followup.send(
-                f"**Head-to-Head** {g_label}{s_label}\n{u1.display_name} vs {u2.display_name}: **{w}–{l}**"
-            )
-
-        elif user:
-            upsert_user(session, user)
-            u = session.get(User, user.id)
-            w, l = wl_for(u.id, None)
-            await interaction.followup.send(
-                f"**Record** ({g_label}{s_label}) for **{u.display_name}**: **{w}–{l}**"
-            )
-
-        else:
-            # Leaderboard (Top 10)
-            wins_by = session.execute(
-                select(base_sub.c.winner_id, func.count().label("w"))
-                .select_from(base_sub)
-                .group_by(base_sub.c.winner_id)
-            ).all()
-            losses_by = session.execute(
-                select(base_sub.c.loser_id, func.count().label("l"))
-                .select_from(base_sub)
-                .group_by(base_sub.c.loser_id)
-            ).all()
-
-            w_map = {row[0]: row[1] for row in wins_by}
-            l_map = {row[0]: row[1] for row in losses_by}
-            user_ids = set(w_map.keys()) | set(l_map.keys())
-
-            rows = []
-            for uid in user_ids:
-                w = w_map.get(uid, 0)
-                l = l_map.get(uid, 0)
-                winp = (w / (w + l)) * 100 if (w + l) > 0 else 0.0
-                rows.append((uid, w, l, winp))
-
-            # Sort: wins desc, losses asc, win% desc
-            rows.sort(key=lambda r: (-r[1], r[2], -r[3]))
-            rows = rows[:10]
-
-            if not rows:
-                await interaction.followup.send(f"No matches recorded yet for that scope ({g_label}{s_label}).")
-            else:
-                lines = []
-                for i, (uid, w, l, wp) in enumerate(rows, 1):
-                    u = session.get(User, uid)
-                    name = u.display_name if u else str(uid)
-                    lines.append(f"{i}. **{name}** — {w}–{l} ({wp:.0f}%)")
-                s_tag = f" — Season: {season}" if season else ""
-                await interaction.followup.send(f"**Top 10 — {g_label}{s_tag}**\n" + "\n".join(lines))
-
-        session.commit()
-    except Exception as e:
-        await interaction.followup.send(f"❌ Error: {e}")
-    finally:
-        session.close()
+    await send_stats(interaction, game=game, user=user, vs=vs, season=season)
 
 # Public: convenience alias for H2H
-@bot.tree.command(name="head2head", description="Head-to-head record between two players.")
+@app_commands.command(name="head2head", description="Head-to-head record between two players.")
 @app_commands.describe(game="Game (optional)", user1="Player 1", user2="Player 2", season="Season (optional)")
 async def head2head(
     interaction: discord.Interaction,
@@ -448,48 +2996,100 @@ async def head2head(
     game: Optional[str] = None,
     season: Optional[str] = None
 ):
-    await record.callback(interaction, game=game, user=user1, vs=user2, season=season)
+    await send_stats(interaction, game=game, user=user1, vs=user2, season=season)
 
-# Public: /leaderboard (routes to /record with no users)
-@bot.tree.command(name="leaderboard", description="Show the top 10 players by record.")
-@app_commands.describe(game="Game name/code (optional)", season="Season filter (optional)")
+# Public: /leaderboard (record with no users, optionally ranked by Elo), one page at a time
+@app_commands.command(name="leaderboard", description="Show the leaderboard by record or Elo, 10 players per page.")
+@app_commands.describe(
+    game="Game name/code (optional; required for Elo)",
+    season="Season filter (optional)",
+    sort="Rank by record (default) or Elo rating",
+    page="Page number (optional, default 1)"
+)
+@app_commands.choices(sort=[
+    app_commands.Choice(name="record", value="record"),
+    app_commands.Choice(name="elo", value="elo"),
+])
 async def leaderboard(
     interaction: discord.Interaction,
     game: Optional[str] = None,
-    season: Optional[str] = None
+    season: Optional[str] = None,
+    sort: Optional[app_commands.Choice[str]] = None,
+    page: Optional[app_commands.Range[int, 1, 1_000_000]] = None
 ):
-    await record.callback(interaction, game=game, user=None, vs=None, season=season)
+    await interaction.response.defer()
+    sort_by = sort.value if sort else "record"
+    try:
+        guild_id = guild_of(interaction)
+        key = stats_key("leaderboard", guild_id, game, season, sort_by, page or 1)
+        text, board = await cached_stats(
+            key, stats_scope(guild_id, game, season), _leaderboard_tx, guild_id, game, season, sort_by, page or 1
+        )
+        if board is None or not (board.has_prev or board.has_next):
+            return await interaction.followup.send(text)
+        view = LeaderboardView(guild_id, game, season, sort_by, board)
+        view.message = await interaction.followup.send(text, view=view, wait=True)
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}")
 
 # ----- Seasons -----
 def require_admin(interaction: discord.Interaction):
     if not is_admin(interaction.user.id):
         raise PermissionError("Admin only.")
 
-@bot.tree.command(name="season_start", description="Start a new season (admin).")
-@app_commands.describe(name="Season name", game="Game name/code (optional)")
-async def season_start(interaction: discord.Interaction, name: str, game: Optional[str] = None):
+def _season_start_tx(session, guild_id: int, who_id: int, name: str, game: Optional[str],
+                     period_days: Optional[float] = None) -> str:
+    begin_write(session)
+    g = get_or_create_game(session, guild_id, game) if game else None
+    s = Season(guild_id=guild_id, name=name, status="active", game_id=g.id if g else None, started_at=now_utc(),
+               rating_period_days=period_days)
+    session.add(s)
+    session.add(AuditLog(guild_id=guild_id, who_id=who_id, action=f"season_start {name}"))
+    on_commit_shared(session, season_cache.invalidate)
+    session.commit()
+    label = f"{name}" + (f" ({g.name})" if g else "")
+    return f"✅ Season started: **{label}**"
+
+@app_commands.command(name="season_start", description="Start a new season (admin).")
+@app_commands.describe(
+    name="Season name",
+    game="Game name/code (optional)",
+    period_days=f"Glicko-2 rating period length in days (optional, default {GLICKO_PERIOD_DAYS:g})"
+)
+async def season_start(
+    interaction: discord.Interaction,
+    name: str,
+    game: Optional[str] = None,
+    period_days: Optional[app_commands.Range[float, 0.01, 365.0]] = None
+):
     try:
         require_admin(interaction)
     except Exception as e:
         return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
 
     await interaction.response.defer(ephemeral=True)
-    session = SessionLocal()
     try:
-        g = get_or_create_game(session, game) if game else None
-        s = Season(name=name, status="active", game_id=g.id if g else None, started_at=now_utc())
-        session.add(s)
-        session.add(AuditLog(who_id=interaction.user.id, action=f"season_start {name}"))
-        session.commit()
-        label = f"{name}" + (f" ({g.name})" if g else "")
-        await interaction.followup.send(f"✅ Season started: **{label}**", ephemeral=True)
+        text = await db.run(_season_start_tx, guild_of(interaction), interaction.user.id, name, game, period_days)
+        await interaction.followup.send(text, ephemeral=True)
     except Exception as e:
-        session.rollback()
         await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
-    finally:
-        session.close()
 
-@bot.tree.command(name="season_end", description="End a season (admin).")
+def _season_end_tx(session, guild_id: int, who_id: int, name: str) -> str:
+    begin_write(session)
+    active = season_cache.named(session, guild_id, name)
+    if not active:
+        return "Season not found or already closed."
+    if len(active) > 1:
+        return f"More than one active season is named **{name}**; rename one before ending it."
+    s = session.get(Season, active[0].id)
+    s.status = "closed"
+    s.ended_at = now_utc()
+    session.add(AuditLog(guild_id=guild_id, who_id=who_id, action=f"season_end {name}"))
+    on_commit_shared(session, season_cache.invalidate)
+    session.commit()
+    return f"✅ Season ended: **{name}**"
+
+@app_commands.command(name="season_end", description="End a season (admin).")
 @app_commands.describe(name="Season name")
 async def season_end(interaction: discord.Interaction, name: str):
     try:
@@ -497,25 +3097,51 @@ async def season_end(interaction: discord.Interaction, name: str):
     except Exception as e:
         return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
     await interaction.response.defer(ephemeral=True)
-    session = SessionLocal()
     try:
-        s = session.execute(
-            select(Season).where(func.lower(Season.name) == name.lower(), Season.status == "active")
-        ).scalar_one_or_none()
-        if not s:
-            return await interaction.followup.send("Season not found or already closed.", ephemeral=True)
-        s.status = "closed"
-        s.ended_at = now_utc()
-        session.add(AuditLog(who_id=interaction.user.id, action=f"season_end {name}"))
-        session.commit()
-        await interaction.followup.send(f"✅ Season ended: **{name}**", ephemeral=True)
+        text = await db.run(_season_end_tx, guild_of(interaction), interaction.user.id, name)
+        await interaction.followup.send(text, ephemeral=True)
     except Exception as e:
-        session.rollback()
         await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
-    finally:
-        session.close()
 
-@bot.tree.command(name="season_reset", description="Reset (delete) all matches for a season (admin).")
+def _season_reset_tx(session, guild_id: int, who_id: int, name: str) -> str:
+    begin_write(session)
+    s = session.execute(
+        select(Season).where(Season.guild_id == guild_id, func.lower(Season.name) == name.lower())
+    ).scalar_one_or_none()
+    if not s:
+        return "Season not found."
+    # Back the season's live matches out of the all-seasons totals, then drop its own rows
+    live = select(Match).where(Match.season_id == s.id, Match.verified == True, Match.voided == False).subquery()
+    for col, is_win in ((live.c.winner_id, True), (live.c.loser_id, False)):
+        for gid, uid, n, elo in session.execute(
+            select(live.c.game_id, col, func.count(), func.coalesce(func.sum(live.c.elo_delta), 0.0))
+            .group_by(live.c.game_id, col)
+        ).all():
+            if is_win:
+                _stat_upsert(session, uid, gid, ALL_SEASONS, -n, 0, -elo)
+            else:
+                _stat_upsert(session, uid, gid, ALL_SEASONS, 0, -n, elo)
+    session.execute(delete(PlayerStat).where(PlayerStat.season_id == s.id))
+    on_commit_shared(session, rank_index.invalidate, s.id)
+    session.execute(delete(GlickoSnapshot).where(GlickoSnapshot.season_id == s.id))
+    first_by_game = session.execute(
+        select(live.c.game_id, func.min(live.c.id), func.min(live.c.played_at)).group_by(live.c.game_id)
+    ).all()
+    # Dupe links from other seasons' matches would block the delete (matches.dupe_of foreign key)
+    session.execute(
+        update(Match).where(Match.dupe_of.in_(select(Match.id).where(Match.season_id == s.id))).values(dupe_of=None)
+    )
+    count = session.query(Match).filter(Match.season_id == s.id).delete()
+    # Later matches in those games were rated against ratings that included this season
+    for gid, first_id, first_played in first_by_game:
+        recompute_ratings(session, gid, first_id)
+        glicko_history_changed(session, gid, [ALL_SEASONS], first_played)
+        on_commit_shared(session, stats_cache.invalidate, guild_id, gid, [s.name])
+    session.add(AuditLog(guild_id=guild_id, who_id=who_id, action=f"season_reset {name} ({count} matches)"))
+    session.commit()
+    return f"🧹 Deleted **{count}** matches from season **{name}**."
+
+@app_commands.command(name="season_reset", description="Reset (delete) all matches for a season (admin).")
 @app_commands.describe(name="Season name")
 async def season_reset(interaction: discord.Interaction, name: str):
     try:
@@ -523,23 +3149,55 @@ async def season_reset(interaction: discord.Interaction, name: str):
     except Exception as e:
         return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
     await interaction.response.defer(ephemeral=True)
-    session = SessionLocal()
     try:
-        s = session.execute(select(Season).where(func.lower(Season.name) == name.lower())).scalar_one_or_none()
-        if not s:
-            return await interaction.followup.send("Season not found.", ephemeral=True)
-        count = session.query(Match).filter(Match.season_id == s.id).delete()
-        session.add(AuditLog(who_id=interaction.user.id, action=f"season_reset {name} ({count} matches)"))
-        session.commit()
-        await interaction.followup.send(f"🧹 Deleted **{count}** matches from season **{name}**.", ephemeral=True)
+        text = await db.run(_season_reset_tx, guild_of(interaction), interaction.user.id, name)
+        await interaction.followup.send(text, ephemeral=True)
     except Exception as e:
-        session.rollback()
         await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
-    finally:
-        session.close()
+
+def _matchup_reset_tx(session, guild_id: int, who_id: int, user1, user2, game: str, season: Optional[str]) -> str:
+    begin_write(session)
+    g = get_or_create_game(session, guild_id, game)
+    s = find_active_season(session, guild_id, season, g) if season else None
+
+    # Ensure users exist / names updated
+    for m in {user1.id: user1, user2.id: user2}.values():
+        upsert_user(session, m)
+
+    q = pair_matches_stmt(g.id, user1.id, user2.id)
+    if s:
+        q = q.where(Match.season_id == s.id)
+
+    voided = session.execute(q).scalars().all()
+    for m in voided:
+        m.voided = True
+        if m.verified:
+            revert_match_stats(session, m)
+    count = len(voided)
+    live = [m for m in voided if m.verified]
+    if live:
+        session.flush()
+        recompute_ratings(session, g.id, min(m.id for m in live))
+        scopes = {ALL_SEASONS} | {m.season_id for m in live if m.season_id}
+        glicko_history_changed(session, g.id, scopes, min(m.played_at for m in live))
+        seasons = {m.season.name for m in live if m.season_id}
+        on_commit_shared(session, stats_cache.invalidate, guild_id, g.id, sorted(seasons), (user1.id, user2.id))
+
+    session.add(AuditLog(
+        guild_id=guild_id,
+        who_id=who_id,
+        action=f"matchup_reset {user1.id}<->{user2.id} in {g.short_code}" + (f" season {s.name}" if s else "")
+    ))
+    session.commit()
+
+    label = f"{g.name}" + (f" — {s.name}" if s else "")
+    return (
+        f"🧹 Reset head-to-head for **{user1.display_name}** vs **{user2.display_name}** in **{label}**. "
+        f"Voided **{count}** matches. Now 0–0."
+    )
 
 # Public: matchup reset (admin-gated, but public success/error)
-@bot.tree.command(name="matchup_reset", description="Admin: reset a head-to-head to 0–0 for a game (optional season).")
+@app_commands.command(name="matchup_reset", description="Admin: reset a head-to-head to 0–0 for a game (optional season).")
 @app_commands.describe(
     user1="Player 1",
     user2="Player 2",
@@ -561,75 +3219,158 @@ async def matchup_reset(
 
     await interaction.response.defer()  # public
 
-    session = SessionLocal()
     try:
-        g = get_or_create_game(session, game)
-        s = find_active_season(session, season, g) if season else None
-
-        # Ensure users exist / names updated
-        for m in {user1.id: user1, user2.id: user2}.values():
-            upsert_user(session, m)
-
-        q = session.query(Match).filter(
-            Match.game_id == g.id,
-            Match.voided == False,
-            or_(
-                and_(Match.winner_id == user1.id, Match.loser_id == user2.id),
-                and_(Match.winner_id == user2.id, Match.loser_id == user1.id),
-            )
-        )
-        if s:
-            q = q.filter(Match.season_id == s.id)
-
-        count = 0
-        for m in q.all():
-            m.voided = True
-            count += 1
-
-        session.add(AuditLog(
-            who_id=interaction.user.id,
-            action=f"matchup_reset {user1.id}<->{user2.id} in {g.short_code}" + (f" season {s.name}" if s else "")
-        ))
-        session.commit()
-
-        label = f"{g.name}" + (f" — {s.name}" if s else "")
-        await interaction.followup.send(
-            f"🧹 Reset head-to-head for **{user1.display_name}** vs **{user2.display_name}** in **{label}**. "
-            f"Voided **{count}** matches. Now 0–0."
-        )
+        text = await db.run(_matchup_reset_tx, guild_of(interaction), interaction.user.id, user1, user2, game, season)
+        await interaction.followup.send(text)
     except Exception as e:
-        session.rollback()
         await interaction.followup.send(f"❌ Error: {e}")
-    finally:
-        session.close()
 
 # ----- Undo -----
-@bot.tree.command(name="undo", description="Undo your last report (within 10 minutes).")
+def _undo_tx(session, guild_id: int, who_id: int) -> str:
+    begin_write(session)
+    m = session.execute(undo_candidate_stmt(guild_id, who_id)).scalars().first()
+    if not m:
+        return "Nothing eligible to undo."
+    m.voided = True
+    if m.verified:
+        revert_match_stats(session, m)
+        session.flush()
+        recompute_ratings(session, m.game_id, m.id)  # no-op unless the game has later matches
+        glicko_history_changed(session, m.game_id, [sid for sid, _ in _match_scopes(m.season_id)], m.played_at)
+        seasons = [m.season.name] if m.season_id else []
+        on_commit_shared(session, stats_cache.invalidate, guild_id, m.game_id, seasons, (m.winner_id, m.loser_id))
+    session.add(AuditLog(guild_id=guild_id, who_id=who_id, action=f"undo match {m.id}"))
+    session.commit()
+    return f"↩️ Voided match `{m.id}`."
+
+@app_commands.command(name="undo", description="Undo your last report (within 10 minutes).")
 async def undo(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
-    session = SessionLocal()
     try:
-        q = select(Match).where(Match.voided == False).order_by(Match.id.desc())
-        if not is_admin(interaction.user.id):
-            q = q.where(
-                Match.reporter_id == interaction.user.id,
-                Match.played_at >= now_utc() - timedelta(minutes=10)
-            )
-        m = session.execute(q).scalars().first()
-        if not m:
-            return await interaction.followup.send("Nothing eligible to undo.", ephemeral=True)
-        m.voided = True
-        session.add(AuditLog(who_id=interaction.user.id, action=f"undo match {m.id}"))
-        session.commit()
-        await interaction.followup.send(f"↩️ Voided match `{m.id}`.", ephemeral=True)
+        text = await db.run(_undo_tx, guild_of(interaction), interaction.user.id)
+        await interaction.followup.send(text, ephemeral=True)
     except Exception as e:
-        session.rollback()
         await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
-    finally:
-        session.close()
+
+def _stats_rebuild_tx(session, guild_id: int, who_id: int) -> str:
+    begin_write(session)
+    n = rebuild_player_stats(session)
+    snaps = run_glicko_periods(session) if np is not None else 0
+    session.add(AuditLog(guild_id=guild_id, who_id=who_id, action=f"stats_rebuild ({n} rows, {snaps} glicko snapshots)"))
+    session.commit()
+    return f"🔁 Rebuilt player stats from match history: **{n}** rows, **{snaps}** Glicko-2 snapshots."
+
+def _glicko_tx(session) -> int:
+    begin_write(session)
+    n = run_glicko_periods(session)
+    if n:
+        on_commit_shared(session, stats_cache.clear)  # /record shows the new Glicko-2 ratings
+    session.commit()
+    return n
+
+# Admin: rebuild the leaderboard aggregate from scratch
+@app_commands.command(name="stats_rebuild", description="Admin: rebuild leaderboard totals and Elo from match history.")
+async def stats_rebuild(interaction: discord.Interaction):
+    try:
+        require_admin(interaction)
+    except Exception as e:
+        return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+    await interaction.response.defer(ephemeral=True)
+    try:
+        text = await db.run(_stats_rebuild_tx, guild_of(interaction), interaction.user.id)
+        await interaction.followup.send(text, ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
+def _db_explain_tx(session) -> str:
+    lines = []
+    for name, ok, plan in explain_hot_queries(session):
+        lines.append(f"{'✅' if ok else '⚠️'} **{name}** — `{plan}`")
+    return "**Hot query plans**\n" + "\n".join(lines)
+
+# Admin: prove the Match hot paths are index-backed
+@app_commands.command(name="db_explain", description="Admin: show SQLite query plans for the hot match queries.")
+async def db_explain(interaction: discord.Interaction):
+    try:
+        require_admin(interaction)
+    except Exception as e:
+        return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+    await interaction.response.defer(ephemeral=True)
+    try:
+        text = await db.run(_db_explain_tx)
+        await interaction.followup.send(text[:2000], ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
+def format_perf() -> str:
+    """Per-command latency table for /stats_perf (ms; p50/p95/p99 are bucket upper bounds)."""
+    snap = perf.snapshot()
+    latency = snap["latency"]
+    commands = sorted({cmd for cmd, _ in latency}, key=lambda c: -latency[(c, "total")].count)
+    ready = f"\n{startup.summary()}" if startup.ready_after is not None else ""
+    if not commands:
+        return "No app commands recorded yet." + ready
+
+    def q(cmd, phase, *qs):
+        h = latency.get((cmd, phase))
+        return "/".join(f"{h.quantile(x):.0f}" for x in qs) if h and h.count else "-"
+
+    lines = [f"{'command':<14}{'n':>6}{'err':>4}  {'total p50/95/99':<16}{'defer':>6}  {'db p50/95':<10}{'send':>6}  {'sql q':>5}{'sql ms':>7}"]
+    for cmd in commands:
+        queries = snap["queries"].get(cmd)
+        avg_q = queries.total / queries.count if queries and queries.count else 0
+        lines.append(
+            f"{cmd[:14]:<14}{latency[(cmd, 'total')].count:>6}{snap['errors'].get(cmd, 0):>4}  "
+            f"{q(cmd, 'total', .5, .95, .99):<16}{q(cmd, 'defer', .5):>6}  {q(cmd, 'db', .5, .95):<10}"
+            f"{q(cmd, 'send', .5):>6}  {avg_q:>5.1f}{q(cmd, 'sql', .5):>7}"
+        )
+    background = snap["statements"].get("background")
+    if background and background.count:
+        lines.append(f"background SQL: {background.count} statements, p50/p95 "
+                     f"{background.quantile(.5):.0f}/{background.quantile(.95):.0f} ms")
+    if isinstance(bot, discord.AutoShardedClient):
+        gateway = shard_latencies()
+        lines += ["", f"{'shard':<6}{'n':>8}{'per min':>9}  {'total p50/95':<13}{'gateway ms':>11}"]
+        for shard in sorted(set(snap["shards"]) | set(gateway)):
+            h, rate = snap["shards"].get(shard, (None, 0.0))
+            q = f"{h.quantile(.5):.0f}/{h.quantile(.95):.0f}" if h and h.count else "-"
+            ping = f"{gateway[shard] * 1000:.0f}" if shard in gateway else "-"
+            lines.append(f"{shard:<6}{h.count if h else 0:>8}{rate * 60:>9.1f}  {q:<13}{ping:>11}")
+    return "**Command latency (ms)**\n```\n" + "\n".join(lines) + "\n```" + ready
+
+# Admin: per-command latency histograms
+@app_commands.command(name="stats_perf", description="Admin: per-command latency (defer/DB/send) and SQL counts.")
+async def stats_perf(interaction: discord.Interaction):
+    try:
+        require_admin(interaction)
+    except Exception as e:
+        return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+    await interaction.response.send_message(format_perf()[:2000], ephemeral=True)
+
+# Admin: data-access pool health
+@app_commands.command(name="db_stats", description="Admin: show database worker pool queue depth and wait times.")
+async def db_stats(interaction: discord.Interaction):
+    try:
+        require_admin(interaction)
+    except Exception as e:
+        return await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+    st = db.stats()
+    cs = stats_cache.stats()
+    relay = (f"\ncache relay: worker {CLUSTER_WORKER}, sent {cache_bus.sent}, received {cache_bus.received}"
+             if CLUSTER_BUS else "")
+    await interaction.response.send_message(
+        f"**DB pool** ({DB_PROFILE} profile) — workers: {st['workers']}, queued: {st['queued']}, running: {st['running']}\n"
+        f"calls: {st['calls']} (errors: {st['errors']}), "
+        f"wait avg/max: {st['wait_avg_ms']:.1f}/{st['wait_max_ms']:.1f} ms, run avg: {st['run_avg_ms']:.1f} ms\n"
+        f"report batches: {report_writer.batches} ({report_writer.reports} reports, largest {report_writer.largest})\n"
+        f"stats requests: {stats_flight.calls} ({stats_flight.shared} coalesced onto an identical in-flight query)\n"
+        f"stats cache: {cs['size']}/{cs['maxsize']} entries, hits {cs['hits']}, misses {cs['misses']}, "
+        f"evictions {cs['evictions']}, invalidated {cs['invalidations']}, expired {cs['expirations']}" + relay,
+        ephemeral=True,
+    )
 
 # Public: /help
-@bot.tree.command(name="help", description="How to use the scoreboard bot")
+@app_commands.command(name="help", description="How to use the scoreboard bot")
 async def help_cmd(interaction: discord.Interaction):
     text = (
         "## 🏆 Scoreboard Bot Help\n"
@@ -640,23 +3381,30 @@ async def help_cmd(interaction: discord.Interaction):
         "• **/report** `game:<name> winner:@User loser:@User [score_w] [score_l] [season]`\n"
         "  Record a result. Example:\n"
         "  `/report game:madden winner:@Key loser:@Cam score_w:21 score_l:17 season:Fall2025`\n"
-        "• **/record** `[game] [user] [vs] [season]` — player record, head-to-head, or top list\n"
+        "• **/record** `[game] [user] [vs] [season]` — player record (with rank when a game is given), head-to-head, or top list\n"
         "• **/head2head** `user1:@User user2:@User [game] [season]` — quick H2H\n"
-        "• **/leaderboard** `[game] [season]` — top 10 by wins (ties break by losses, then win%)\n\n"
+        "• **/leaderboard** `[game] [season] [sort] [page]` — 10 per page by wins (ties break by losses); "
+        "`sort:elo` ranks a game by Elo rating. Use the ◀ / ▶ buttons to browse\n\n"
 
         "### 🧹 Admin Utilities\n"
-        "• **/undo** — players: undo your last report (10 min). Admins: undo latest match.\n"
-        "• **/matchup_reset** `user1:@User user2:@User game:<name> [season]` — reset a rivalry to **0–0** for a game.\n\n"
+        "• **/undo** — players: undo your last report (10 min). Admins: undo the server's latest match.\n"
+        "• **/matchup_reset** `user1:@User user2:@User game:<name> [season]` — reset a rivalry to **0–0** for a game.\n"
+        "• **/stats_rebuild** — admins: recompute leaderboard totals, Elo and Glicko-2 from match history.\n"
+        "• **/db_explain** — admins: check the hot match queries are using indexes.\n"
+        "• **/db_stats** — admins: database worker queue depth, wait times and stats cache counters.\n"
+        "• **/stats_perf** — admins: per-command latency (defer, database, send) and SQL query counts.\n\n"
 
         "### 📅 Seasons (Admin Only)\n"
-        "• **/season_start** `name:<name> [game]`\n"
+        "• **/season_start** `name:<name> [game] [period_days]` — `period_days` sets the Glicko-2 rating period\n"
         "• **/season_end** `name:<name>`\n"
         "• **/season_reset** `name:<name>`\n\n"
 
         "### ℹ️ Notes\n"
         "• Match, stats, **and matchup resets** post **publicly**.\n"
+        "• Every server has its own games, seasons and leaderboards.\n"
         "• Game names are case/whitespace-insensitive (e.g., `Madden`, `madden`, `M a d d e n` are the same).\n"
         "• Add `[game]` and/or `[season]` to narrow stats (e.g., `game:madden season:Fall2025`).\n"
+        "• Glicko-2 ratings (shown as rating ± 2·RD in `/record`) update after each rating period closes.\n"
         "• Admins are the user IDs in the bot config (`ADMINS`).\n"
     )
     await interaction.response.send_message(text)
@@ -665,7 +3413,57 @@ async def help_cmd(interaction: discord.Interaction):
 def _looks_like_bot_token(t: str) -> bool:
     return isinstance(t, str) and t.count(".") == 2 and len(t) > 50
 
+COMMANDS = (ping, report, record, head2head, leaderboard, season_start, season_end, season_reset,
+            matchup_reset, undo, stats_rebuild, db_explain, stats_perf, db_stats, help_cmd)
+
+def create_bot() -> RecordsBot:
+    """The bot client with its commands and event handlers registered (created on first call)."""
+    global bot
+    if bot is None:
+        bot = RecordsBot()
+        for handler in (on_ready, on_shard_ready, on_shard_disconnect, on_shard_resumed, on_app_command_completion):
+            bot.event(handler)
+        bot.tree.error(on_app_command_error)
+        for command in COMMANDS:
+            bot.tree.add_command(command)
+    return bot
+
+def create_app(bind=None) -> RecordsBot:
+    """Application factory: migrate the database, then build the bot. Importing bot.py does
+    neither, so tooling pays only for what it uses; caches fill on first use or in setup_hook."""
+    with startup.phase("storage"):
+        init_storage(bind)
+    with startup.phase("bot"):
+        return create_bot()
+
+def _check_indexes() -> int:
+    """`python bot.py --check-indexes`: print hot query plans, exit non-zero unless each seeks its index."""
+    init_storage()
+    session = SessionLocal()
+    try:
+        results = explain_hot_queries(session)
+    finally:
+        session.close()
+    for name, ok, plan in results:
+        print(f"{'OK  ' if ok else 'FAIL'} {name}: {plan}")
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+# Logged with the other phases once the bot is ready (tooling imports bot.py quietly)
+startup.record("import", time.perf_counter() - startup.started, log=False)
+
 if __name__ == "__main__":
+    if "--check-indexes" in sys.argv:
+        sys.exit(_check_indexes())
     if not TOKEN or not _looks_like_bot_token(TOKEN):
         raise RuntimeError("DISCORD_TOKEN seems invalid or missing. Use the Bot tab token (three dot-separated parts).")
-    bot.run(TOKEN)
+    if "--cluster" in sys.argv:
+        # python bot.py --cluster N : N worker processes splitting the shards, one shared database
+        i = sys.argv.index("--cluster")
+        workers = int(sys.argv[i + 1]) if i + 1 < len(sys.argv) and sys.argv[i + 1].isdigit() else os.cpu_count() or 2
+        sys.exit(asyncio.run(run_cluster(workers)))
+    if CLUSTER_BUS:
+        # The launcher stops workers with SIGTERM; shut down as cleanly as on Ctrl+C
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+    app = create_app()
+    app.force_sync = "--force-sync" in sys.argv
+    app.run(TOKEN)